@@ -7,11 +7,18 @@ const getSetScore = require('./getSetScore');
 const sleep = require('../sleep');
 
 (async () => {
+  // Weekly series to track. Each series is its own scene in matches.json.
+  const series = [
+    { scene: 'foco-weekly-wednesday', eventName: 'melee-singles', first: 190, last: 350 },
+  ];
+
   const tournaments = [];
 
-    for (let i = 190; i <= 350; i++) {
-      tournaments.push({ tournamentName: `foco-weekly-wednesday-${i}`, eventName: 'melee-singles' });
+  for (const { scene, eventName, first, last } of series) {
+    for (let i = first; i <= last; i++) {
+      tournaments.push({ tournamentName: `${scene}-${i}`, eventName, scene });
     }
+  }
   const dataFilePath = path.join(__dirname, 'data.json');
   let allEventData = {};
 
@@ -23,7 +30,7 @@ const sleep = require('../sleep');
     allEventData = {};
   }
 
-  for (const { tournamentName, eventName } of tournaments) {
+  for (const { tournamentName, eventName, scene } of tournaments) {
     // Create a unique key for the event
     const eventKey = `${tournamentName}_${eventName}`;
     if (allEventData[eventKey]) {
@@ -64,6 +71,7 @@ const sleep = require('../sleep');
     }
 
     allEventData[eventKey] = {
+      scene: scene,
       tournamentName: tournamentName,
       eventName: actualEventName,
       eventId: eventId,
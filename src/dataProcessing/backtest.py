@@ -0,0 +1,249 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from set_table import load_set_table, load_name_mappings
+from shared import ELO_START, add_workers_argument, head_to_head, pool_map, record_set, worker_data
+
+# NOTE: this backtests a substitute model, not predictor.py's. predictor.py
+# trains on playerDataPoints.json, which computePlayerDataPoints.js builds
+# once from every set (and relative to "now"), so its features cannot be
+# reconstructed as of an earlier event. The substitute below is a logistic
+# regression on point-in-time win/game rates, experience, Elo and H2H.
+
+# ---------------------------
+# Feature Store
+# ---------------------------
+
+FEATURE_COLUMNS = [
+    'winRateDiff',
+    'gameWinRateDiff',
+    'experienceDiff',
+    'eloDiff',
+    'h2hWinRate',
+    'h2hMatches',
+    'bestOf5',
+]
+
+# Features that do not change sign when the two players are swapped
+SYMMETRIC_FEATURES = ['h2hMatches', 'bestOf5']
+
+class FeatureStore:
+    """
+    Running per-player and head-to-head state, updated one event at a time.
+
+    Features for the sets of an event are read from the state as it was
+    before the event, then the event's results are applied. Every set is
+    therefore described only with information available when it was played.
+    """
+
+    def __init__(self, n_players):
+        self.played = np.zeros(n_players)
+        self.wins = np.zeros(n_players)
+        self.games_won = np.zeros(n_players)
+        self.games_lost = np.zeros(n_players)
+        self.elo = np.full(n_players, ELO_START)
+        self.h2h = {}  # (low index, high index) -> [sets, sets won by low index]
+
+    def features(self, p1, p2, best_of_5):
+        win_rate = (self.wins + 1) / (self.played + 2)
+        game_win_rate = (self.games_won + 1) / (self.games_won + self.games_lost + 2)
+        experience = np.log1p(self.played)
+
+        h2h_rate = np.empty(len(p1))
+        h2h_count = np.empty(len(p1))
+        for i, (a, b) in enumerate(zip(p1, p2)):
+            a_wins, sets = head_to_head(self.h2h, a, b)
+            h2h_rate[i] = (a_wins + 1) / (sets + 2) - 0.5
+            h2h_count[i] = np.log1p(sets)
+
+        return np.column_stack([
+            win_rate[p1] - win_rate[p2],
+            game_win_rate[p1] - game_win_rate[p2],
+            experience[p1] - experience[p2],
+            (self.elo[p1] - self.elo[p2]) / 400,
+            h2h_rate,
+            h2h_count,
+            best_of_5,
+        ])
+
+    def apply(self, winners, losers, winner_games, loser_games):
+        np.add.at(self.played, winners, 1)
+        np.add.at(self.played, losers, 1)
+        np.add.at(self.wins, winners, 1)
+        np.add.at(self.games_won, winners, winner_games)
+        np.add.at(self.games_lost, winners, loser_games)
+        np.add.at(self.games_won, losers, loser_games)
+        np.add.at(self.games_lost, losers, winner_games)
+
+        # Elo and H2H are order dependent, so apply sets in completion order
+        for w, l in zip(winners, losers):
+            record_set(self.elo, self.h2h, w, l)
+
+def build_feature_rows(sets_df):
+    """
+    Replays every event once, in eventStartAt order, through a FeatureStore.
+
+    Returns:
+    - X (ndarray): Pre-event features per set, player1 = alphabetically first player.
+    - y (ndarray): 1 if player1 won the set.
+    - event_offsets (ndarray): Row range of event k is event_offsets[k]:event_offsets[k + 1].
+    - events (DataFrame): eventId, tournamentName and eventStartAt per event.
+    """
+    sets_df = sets_df.sort_values(['eventStartAt', 'eventId', 'completedAt'], kind='stable').reset_index(drop=True)
+    players = pd.Index(sorted(pd.unique(pd.concat([sets_df['winnerName'], sets_df['loserName']]))))
+    winners = players.get_indexer(sets_df['winnerName'])
+    losers = players.get_indexer(sets_df['loserName'])
+    winner_games = sets_df['winnerScore'].to_numpy(dtype=float)
+    loser_games = sets_df['loserScore'].to_numpy(dtype=float)
+    best_of_5 = (sets_df['bestOf'] == 'Best of 5').to_numpy(dtype=float)
+
+    # Alphabetical orientation keeps the label independent of who won
+    p1 = np.minimum(winners, losers)
+    p2 = np.maximum(winners, losers)
+    y = (winners == p1).astype(float)
+
+    event_starts = np.flatnonzero(sets_df['eventId'].ne(sets_df['eventId'].shift()).to_numpy())
+    event_offsets = np.append(event_starts, len(sets_df))
+    events = sets_df.loc[event_starts, ['eventId', 'tournamentName', 'eventStartAt']].reset_index(drop=True)
+
+    store = FeatureStore(len(players))
+    X = np.empty((len(sets_df), len(FEATURE_COLUMNS)))
+    for start, end in zip(event_offsets[:-1], event_offsets[1:]):
+        X[start:end] = store.features(p1[start:end], p2[start:end], best_of_5[start:end])
+        store.apply(winners[start:end], losers[start:end], winner_games[start:end], loser_games[start:end])
+    return X, y, event_offsets, events
+
+# ---------------------------
+# Walk-Forward Folds
+# ---------------------------
+
+def _flip(X):
+    flipped = X.copy()
+    antisymmetric = [i for i, name in enumerate(FEATURE_COLUMNS) if name not in SYMMETRIC_FEATURES]
+    flipped[:, antisymmetric] *= -1
+    return flipped
+
+def run_fold(k):
+    """
+    Trains on every event before event k and predicts every set in event k.
+    """
+    X, y, event_offsets = worker_data['X'], worker_data['y'], worker_data['event_offsets']
+    train_end, test_end = event_offsets[k], event_offsets[k + 1]
+    X_train = np.vstack([X[:train_end], _flip(X[:train_end])])
+    y_train = np.concatenate([y[:train_end], 1 - y[:train_end]])
+
+    model = make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000))
+    model.fit(X_train, y_train)
+    return k, model.predict_proba(X[train_end:test_end])[:, 1]
+
+# ---------------------------
+# Metrics
+# ---------------------------
+
+def score_predictions(y_true, y_prob, eps=1e-15):
+    clipped = np.clip(y_prob, eps, 1 - eps)
+    return {
+        'sets': int(len(y_true)),
+        'logLoss': float(-np.mean(y_true * np.log(clipped) + (1 - y_true) * np.log(1 - clipped))),
+        'brier': float(np.mean((y_prob - y_true) ** 2)),
+        'accuracy': float(np.mean((y_prob >= 0.5) == (y_true == 1))),
+        'meanPredicted': float(np.mean(y_prob)),
+        'meanObserved': float(np.mean(y_true)),
+    }
+
+def calibration_table(y_true, y_prob, n_bins=10):
+    bins = np.minimum((y_prob * n_bins).astype(int), n_bins - 1)
+    counts = np.bincount(bins, minlength=n_bins)
+    predicted = np.bincount(bins, weights=y_prob, minlength=n_bins)
+    observed = np.bincount(bins, weights=y_true, minlength=n_bins)
+    table = pd.DataFrame({
+        'bin': [f"{i / n_bins:.1f}-{(i + 1) / n_bins:.1f}" for i in range(n_bins)],
+        'sets': counts,
+        'meanPredicted': np.divide(predicted, counts, out=np.full(n_bins, np.nan), where=counts > 0),
+        'meanObserved': np.divide(observed, counts, out=np.full(n_bins, np.nan), where=counts > 0),
+    })
+    ece = float(np.nansum(np.abs(table['meanPredicted'] - table['meanObserved']) * counts) / max(len(y_true), 1))
+    return table, ece
+
+# ---------------------------
+# Backtest
+# ---------------------------
+
+def run_backtest(sets_df, min_train_events=10, max_workers=None):
+    """
+    Walk-forward backtest: for each event k (from min_train_events on), train
+    on events before k and predict every set in k.
+
+    Returns per-event metrics, overall metrics and the calibration table.
+    """
+    X, y, event_offsets, events = build_feature_rows(sets_df)
+    folds = list(range(min_train_events, len(events)))
+    if not folds:
+        raise ValueError(f"Need more than {min_train_events} events to backtest, found {len(events)}.")
+
+    # Each fold only receives its event index; the feature matrix is sent once per worker
+    shared = {'X': X, 'y': y, 'event_offsets': event_offsets}
+    predictions = dict(pool_map(run_fold, folds, max_workers, shared))
+
+    per_event = []
+    for k in folds:
+        y_true = y[event_offsets[k]:event_offsets[k + 1]]
+        per_event.append({
+            'eventId': int(events.at[k, 'eventId']),
+            'tournamentName': events.at[k, 'tournamentName'],
+            'eventStartAt': int(events.at[k, 'eventStartAt']),
+            **score_predictions(y_true, predictions[k]),
+        })
+
+    all_true = y[event_offsets[folds[0]]:]
+    all_prob = np.concatenate([predictions[k] for k in folds])
+    calibration, ece = calibration_table(all_true, all_prob)
+    overall = {**score_predictions(all_true, all_prob), 'events': len(folds), 'expectedCalibrationError': ece}
+    return pd.DataFrame(per_event), overall, calibration
+
+def main():
+    parser = argparse.ArgumentParser(description=(
+        "Walk-forward backtest, event by event, of a substitute model: logistic regression on "
+        "point-in-time rates, experience, Elo and H2H. This is not predictor.py's model, whose "
+        "playerDataPoints.json features cannot be rebuilt as of past events."
+    ))
+    parser.add_argument('--min-train-events', type=int, default=10, help="Events used before the first fold")
+    add_workers_argument(parser)
+    parser.add_argument('--scene', help="Only backtest this scene")
+    parser.add_argument('--output', help="Optional path for a JSON report")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    sets_df = load_set_table(name_mappings=load_name_mappings())
+    if args.scene:
+        sets_df = sets_df[sets_df['scene'] == args.scene]
+    per_event, overall, calibration = run_backtest(sets_df, args.min_train_events, args.workers)
+    elapsed = time.perf_counter() - start
+
+    pd.set_option('display.width', 200)
+    print(per_event.drop(columns=['eventId', 'eventStartAt']).to_string(index=False, float_format='%.3f'))
+    print("\nCalibration:")
+    print(calibration.to_string(index=False, float_format='%.3f'))
+    print("\nOverall:")
+    for name, value in overall.items():
+        print(f"  {name}: {value:.4f}" if isinstance(value, float) else f"  {name}: {value}")
+    print(f"\nReplayed {overall['events']} folds with {args.workers} workers in {elapsed:.2f}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'overall': overall,
+                'perEvent': per_event.to_dict(orient='records'),
+                'calibration': calibration.to_dict(orient='records'),
+            }, f, indent=2)
+        print(f"Report saved to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from shared import add_workers_argument, pool_map, worker_data
+
+ENSEMBLE_PATH = Path(__file__).resolve().parent / 'bootstrap_ensemble.npz'
+
+# ---------------------------
+# Event-Level Resampling
+# ---------------------------
+
+def event_row_index(groups):
+    """
+    Maps each event to the training rows it produced.
+
+    Resampling whole events keeps a player's correlated sets from the same
+    night (and both orientations of every set) together in a replicate.
+    """
+    order = np.argsort(groups, kind='stable')
+    _, starts = np.unique(groups[order], return_index=True)
+    return np.split(order, starts[1:])
+
+def fit_replicate(seed):
+    """
+    Fits one bootstrap replicate, warm-started from the main model.
+
+    Returns the coefficients with the intercept appended as the last entry.
+    """
+    rng = np.random.default_rng(seed)
+    event_rows = worker_data['event_rows']
+    sampled = rng.integers(0, len(event_rows), size=len(event_rows))
+    rows = np.concatenate([event_rows[e] for e in sampled])
+
+    model = LogisticRegression(C=worker_data['C'], solver='lbfgs', max_iter=1000, warm_start=True)
+    model.coef_ = worker_data['coef'].copy()
+    model.intercept_ = worker_data['intercept'].copy()
+    model.fit(worker_data['X'][rows], worker_data['y'][rows])
+    return np.append(model.coef_.ravel(), model.intercept_)
+
+def fit_bootstrap_ensemble(model, X, y, groups, n_models=200, max_workers=None, seed=0):
+    """
+    Fits n_models event-resampled replicates of a fitted logistic regression.
+
+    Parameters:
+    - model (LogisticRegression): The fitted main model, used for warm starts and C.
+    - X (ndarray): Training feature matrix, shared by every replicate.
+    - y (ndarray): Training labels.
+    - groups (ndarray): eventId of every training row.
+
+    Returns:
+    - ndarray: Stacked coefficients of shape (n_models, n_features + 1), intercept last.
+    """
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y)
+    event_rows = event_row_index(np.asarray(groups))
+    seeds = np.random.SeedSequence(seed).generate_state(n_models)
+
+    # Each fit only receives a seed; the feature matrix is sent once per worker
+    shared = {'X': X, 'y': y, 'event_rows': event_rows,
+              'coef': model.coef_, 'intercept': model.intercept_, 'C': model.C}
+    return np.vstack(pool_map(fit_replicate, seeds, max_workers, shared))
+
+# ---------------------------
+# Batched Prediction
+# ---------------------------
+
+def ensemble_probabilities(ensemble, feature_matrix):
+    """
+    Win probabilities of every ensemble member for every row: one matrix product.
+
+    Returns an array of shape (n_rows, n_models).
+    """
+    feature_matrix = np.asarray(feature_matrix, dtype=float)
+    logits = feature_matrix @ ensemble[:, :-1].T + ensemble[:, -1]
+    return 1.0 / (1.0 + np.exp(-logits))
+
+def prediction_interval(probabilities, level=0.9):
+    tail = (1 - level) / 2 * 100
+    lower, median, upper = np.percentile(probabilities, [tail, 50, 100 - tail], axis=-1)
+    return lower, median, upper
+
+def symmetric_interval(ensemble, forward_vector, reverse_vector, level=0.9):
+    """
+    Interval for player1 winning, averaging both orientations per ensemble member
+    the same way the Streamlit page averages the point prediction.
+    """
+    probabilities = ensemble_probabilities(ensemble, np.vstack([forward_vector, reverse_vector]))
+    combined = (probabilities[0] + 1 - probabilities[1]) / 2
+    lower, median, upper = prediction_interval(combined, level)
+    return float(lower), float(median), float(upper)
+
+def model_fingerprint(model):
+    # The main model's coefficients with the intercept last, same layout as an ensemble row
+    return np.append(np.ravel(model.coef_), model.intercept_)
+
+def matches_model(fingerprint, model):
+    """
+    True if an ensemble saved with this fingerprint was fitted around 'model'.
+    """
+    current = model_fingerprint(model)
+    return fingerprint.shape == current.shape and np.allclose(fingerprint, current)
+
+def save_ensemble(ensemble, columns, fingerprint, path=ENSEMBLE_PATH):
+    np.savez(path, coefficients=ensemble, columns=np.asarray(columns, dtype=str), fingerprint=fingerprint)
+
+def load_ensemble(path=ENSEMBLE_PATH):
+    """
+    Returns the stacked coefficients, the feature columns and the fingerprint
+    of the main model the ensemble was fitted around (None for older files).
+    """
+    with np.load(path) as data:
+        fingerprint = data['fingerprint'] if 'fingerprint' in data.files else None
+        return data['coefficients'], data['columns'].tolist(), fingerprint
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit the bootstrap ensemble used for prediction intervals.")
+    parser.add_argument('--models', type=int, default=200, help="Number of bootstrap replicates")
+    add_workers_argument(parser)
+    parser.add_argument('--queries', type=int, default=1000, help="Matchups used for the latency benchmark")
+    args = parser.parse_args()
+
+    # Imported here so pool workers never retrain the main model on import
+    from predictor import X, y, training_groups, model
+
+    start = time.perf_counter()
+    ensemble = fit_bootstrap_ensemble(model, X, y, training_groups, args.models, args.workers)
+    refit_seconds = time.perf_counter() - start
+    save_ensemble(ensemble, X.columns, model_fingerprint(model))
+    print(f"Fitted {args.models} replicates with {args.workers} workers in {refit_seconds:.2f}s")
+    print(f"Ensemble saved to {ENSEMBLE_PATH}")
+
+    # Per-query latency: one matchup at a time, then all matchups in one batch
+    queries = np.asarray(X, dtype=float)[np.random.default_rng(0).integers(0, len(X), size=args.queries)]
+    start = time.perf_counter()
+    for row in queries:
+        prediction_interval(ensemble_probabilities(ensemble, row[None, :]))
+    single_ms = (time.perf_counter() - start) / len(queries) * 1000
+    start = time.perf_counter()
+    prediction_interval(ensemble_probabilities(ensemble, queries))
+    batched_ms = (time.perf_counter() - start) / len(queries) * 1000
+    print(f"Interval latency: {single_ms:.3f} ms per single query, {batched_ms:.4f} ms per query batched")
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,29 @@
+import argparse
 import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
 from tabulate import tabulate
 
+from set_table import DATA_DIR, MATCHES_PATH, NAME_MAPPINGS_PATH, canonical_name, load_set_table
+
+# ---------------------------
+# Data Loading (once per process)
+# ---------------------------
+
 # Load player data
-with open('../data/playerDataPoints.json', 'r') as f:
+with open(DATA_DIR / 'playerDataPoints.json', 'r') as f:
     player_data = json.load(f)
 
 # Load name mappings
-with open('nameMappings.json', 'r') as f:
+with open(NAME_MAPPINGS_PATH, 'r') as f:
     name_mappings = json.load(f)
 
 # Normalize player names in player_data
@@ -36,83 +52,235 @@ player_df = player_df.fillna(0)
 player_df['clutchFactor'] = player_df['winRateDecidingGames'] - player_df['overallWinRate']
 player_df['straightVsOverall'] = player_df['winRateStraightMatches'] - player_df['overallWinRate']
 
-# Define functions
+# Columns returned by default (nested records like 'headToHeadRecords' are opt-in)
+flat_columns = [col for col in player_df.columns if player_df[col].dtype != object]
+
+# Query results are built from plain dicts prepared here, so a query never
+# creates a DataFrame; inf is not valid JSON and becomes null
+player_records = (
+    player_df.replace([np.inf, -np.inf], np.nan).astype(object)
+    .where(lambda df: df.notna(), None)
+    .to_dict('index')
+)
+
+# Load match data once and aggregate it by unordered player pair
+sets_df = load_set_table(MATCHES_PATH, name_mappings)
+sets_df['player1'] = sets_df[['winnerName', 'loserName']].min(axis=1)
+sets_df['player2'] = sets_df[['winnerName', 'loserName']].max(axis=1)
+sets_df['player1Won'] = (sets_df['winnerName'] == sets_df['player1']).astype(int)
+sets_df['player1Games'] = sets_df['winnerScore'].where(sets_df['player1Won'] == 1, sets_df['loserScore'])
+sets_df['player2Games'] = sets_df['loserScore'].where(sets_df['player1Won'] == 1, sets_df['winnerScore'])
+
+by_pair = sets_df.groupby(['player1', 'player2'])
+matchup_table = by_pair.agg(
+    totalMatches=('player1Won', 'size'),
+    player1Wins=('player1Won', 'sum'),
+    player1Games=('player1Games', 'sum'),
+    player2Games=('player2Games', 'sum'),
+)
+last_sets = sets_df.loc[by_pair['completedAt'].idxmax()].set_index(['player1', 'player2'])
+matchup_table['lastMatchEvent'] = last_sets['tournamentName']
+matchup_table['lastMatchWinner'] = last_sets['winnerName']
+matchup_table = matchup_table.reset_index().sort_values('totalMatches', ascending=False, kind='stable')
+matchup_table['player2Wins'] = matchup_table['totalMatches'] - matchup_table['player1Wins']
+matchup_table['player1WinRate'] = matchup_table['player1Wins'] / matchup_table['totalMatches'] * 100
+matchup_table['player2WinRate'] = matchup_table['player2Wins'] / matchup_table['totalMatches'] * 100
+
+# (player1, player2) -> aggregated record, player1 being the alphabetically first
+h2h_records = {
+    (record['player1'], record['player2']): record
+    for record in matchup_table.astype(object).to_dict('records')
+}
+matchup_rows = [
+    {col: record[col] for col in ('player1', 'player2', 'totalMatches', 'player1Wins',
+                                  'player2Wins', 'player1WinRate', 'player2WinRate')}
+    for record in matchup_table.astype(object).to_dict('records')
+]
+
+# ---------------------------
+# Queries
+# ---------------------------
+
+@lru_cache(maxsize=None)
+def stat_order(stat_name, ascending):
+    # Player names ordered by a stat, ties in table order (like nlargest / nsmallest)
+    values = player_df[stat_name].to_numpy(dtype=float)
+    return player_df.index[np.argsort(values if ascending else -values, kind='stable')].tolist()
+
+def query_sorted_players(stat_name, ascending=False, top_n=10, columns=None):
+    if stat_name not in player_df.columns:
+        raise KeyError(f"Statistic '{stat_name}' not found.")
+    if stat_name not in flat_columns:
+        raise ValueError(f"Statistic '{stat_name}' is not numeric and cannot be sorted.")
+    columns = columns or [stat_name] + [col for col in flat_columns if col != stat_name]
+    unknown = [col for col in columns if col not in player_df.columns]
+    if unknown:
+        raise KeyError(f"Columns {unknown} not found.")
+    return [
+        {'player': name, **{col: player_records[name][col] for col in columns}}
+        for name in stat_order(stat_name, bool(ascending))[:top_n]
+    ]
+
+def query_most_played_matchups(top_n=10):
+    return matchup_rows[:top_n]
+
+def query_head_to_head(player1, player2):
+    player1 = canonical_name(player1, name_mappings)
+    player2 = canonical_name(player2, name_mappings)
+    record = h2h_records.get(tuple(sorted([player1, player2])))
+    if record is None:
+        raise KeyError(f"No sets found between '{player1}' and '{player2}'.")
+
+    player1_is_first = record['player1'] == player1
+    player1_wins = int(record['player1Wins'] if player1_is_first else record['player2Wins'])
+    return [{
+        'player1': player1,
+        'player2': player2,
+        'totalMatches': int(record['totalMatches']),
+        'player1Wins': player1_wins,
+        'player2Wins': int(record['totalMatches']) - player1_wins,
+        'player1WinRate': player1_wins / record['totalMatches'] * 100,
+        'player1Games': int(record['player1Games'] if player1_is_first else record['player2Games']),
+        'player2Games': int(record['player2Games'] if player1_is_first else record['player1Games']),
+        'lastMatchEvent': record['lastMatchEvent'],
+        'lastMatchWinner': record['lastMatchWinner'],
+    }]
+
+# ---------------------------
+# Interactive Output
+# ---------------------------
 
 def sort_players_by_stat(stat_name, ascending=False, top_n=10):
     if stat_name not in player_df.columns:
         print(f"Statistic '{stat_name}' not found.")
         return
-    sorted_df = player_df.sort_values(by=stat_name, ascending=ascending)
-    print(tabulate(sorted_df.head(top_n), headers='keys', tablefmt='psql'))
+    print(tabulate(query_sorted_players(stat_name, ascending, top_n), headers='keys', tablefmt='psql'))
 
 def get_most_played_matchups(top_n=10):
-    # Load match data
-    try:
-        with open('../data/matches.json', 'r') as f:
-            matches = json.load(f)
-    except FileNotFoundError:
-        print("Error: 'matches.json' file not found.")
-        return
-    except json.JSONDecodeError:
-        print("Error: 'matches.json' contains invalid JSON.")
-        return
-
-    matches_df = pd.DataFrame(matches)
-    
-    # Check if necessary columns exist
-    required_columns = {'player1', 'player2', 'winner'}
-    if not required_columns.issubset(matches_df.columns):
-        print(f"Error: 'matches.json' must contain columns: {required_columns}")
-        return
-    
-    # Normalize player names in matches
-    matches_df['player1'] = matches_df['player1'].apply(lambda x: name_mappings.get(x, x))
-    matches_df['player2'] = matches_df['player2'].apply(lambda x: name_mappings.get(x, x))
-    matches_df['winner'] = matches_df['winner'].apply(lambda x: name_mappings.get(x, x))
-    
-    # Create a consistent representation for matchups
-    matches_df['matchup'] = matches_df.apply(
-        lambda row: tuple(sorted([row['player1'], row['player2']])), axis=1
-    )
-    
-    # Count matchups
-    matchup_counts = matches_df['matchup'].value_counts().head(top_n)
-    
-    # Get win rates for each matchup
-    matchup_stats = []
-    for matchup, count in matchup_counts.items():
-        p1, p2 = matchup
-        total_matches = count
-        p1_wins = matches_df[
-            ((matches_df['player1'] == p1) & (matches_df['player2'] == p2) & (matches_df['winner'] == p1)) |
-            ((matches_df['player1'] == p2) & (matches_df['player2'] == p1) & (matches_df['winner'] == p1))
-        ].shape[0]
-        p2_wins = total_matches - p1_wins
-        win_rate_p1 = p1_wins / total_matches if total_matches > 0 else 0
-        win_rate_p2 = p2_wins / total_matches if total_matches > 0 else 0
-        matchup_stats.append({
-            'Player 1': p1,
-            'Player 2': p2,
-            'Total Matches': total_matches,
-            f'Win Rate {p1}': f"{win_rate_p1:.2%}",
-            f'Win Rate {p2}': f"{win_rate_p2:.2%}"
-        })
-    matchup_df = pd.DataFrame(matchup_stats)
+    matchup_df = pd.DataFrame(query_most_played_matchups(top_n))
+    matchup_df['player1WinRate'] = matchup_df['player1WinRate'].map(lambda rate: f"{rate:.2f}%")
+    matchup_df['player2WinRate'] = matchup_df['player2WinRate'].map(lambda rate: f"{rate:.2f}%")
     print(tabulate(matchup_df, headers='keys', tablefmt='psql'))
 
 def sort_players_by_clutch_factor(ascending=False, top_n=10):
-    if 'clutchFactor' not in player_df.columns:
-        print("Clutch factor not calculated.")
-        return
-    sorted_df = player_df.sort_values(by='clutchFactor', ascending=ascending)
-    print(tabulate(sorted_df.head(top_n), headers='keys', tablefmt='psql'))
+    print(tabulate(query_sorted_players('clutchFactor', ascending, top_n), headers='keys', tablefmt='psql'))
 
 def compare_straight_vs_normal_win_rate(ascending=False, top_n=10):
-    if 'straightVsOverall' not in player_df.columns:
-        print("Straight vs overall win rate difference not calculated.")
-        return
-    sorted_df = player_df.sort_values(by='straightVsOverall', ascending=ascending)
-    print(tabulate(sorted_df.head(top_n), headers='keys', tablefmt='psql'))
+    print(tabulate(query_sorted_players('straightVsOverall', ascending, top_n), headers='keys', tablefmt='psql'))
+
+def show_head_to_head(player1, player2):
+    try:
+        print(tabulate(query_head_to_head(player1, player2), headers='keys', tablefmt='psql', showindex=False))
+    except KeyError as e:
+        print(e.args[0])
+
+# ---------------------------
+# Batch Mode
+# ---------------------------
+
+# Query spec 'type' -> (required fields, handler taking the spec)
+QUERY_TYPES = {
+    'sort': (('stat',), lambda spec: query_sorted_players(
+        spec['stat'], spec.get('ascending', False), spec.get('top_n', 10), spec.get('columns'))),
+    'clutch': ((), lambda spec: query_sorted_players(
+        'clutchFactor', spec.get('ascending', False), spec.get('top_n', 10), spec.get('columns'))),
+    'straight': ((), lambda spec: query_sorted_players(
+        'straightVsOverall', spec.get('ascending', False), spec.get('top_n', 10), spec.get('columns'))),
+    'matchups': ((), lambda spec: query_most_played_matchups(spec.get('top_n', 10))),
+    'h2h': (('player1', 'player2'), lambda spec: query_head_to_head(spec['player1'], spec['player2'])),
+}
+
+def run_query(line):
+    """
+    Executes one JSON query spec and returns its JSON-lines result.
+
+    Errors are reported in the result instead of stopping the batch.
+    """
+    try:
+        spec = json.loads(line)
+    except json.JSONDecodeError as e:
+        return json.dumps({'query': line.strip(), 'ok': False, 'error': f"Invalid JSON: {e}"})
+    if not isinstance(spec, dict):
+        return json.dumps({'query': spec, 'ok': False, 'error': "Query spec must be a JSON object."})
+
+    try:
+        if spec.get('type') not in QUERY_TYPES:
+            raise ValueError(f"Unknown query type {spec.get('type')!r}, expected one of {sorted(QUERY_TYPES)}.")
+        required, handler = QUERY_TYPES[spec['type']]
+        missing = [field for field in required if field not in spec]
+        if missing:
+            raise ValueError(f"Query is missing {missing}.")
+        rows = handler(spec)
+    except (KeyError, ValueError, TypeError) as e:
+        return json.dumps({'query': spec, 'ok': False, 'error': str(e.args[0] if e.args else e)})
+    return json.dumps({'query': spec, 'ok': True, 'rows': rows})
+
+def run_batch(lines, workers=1, output=sys.stdout):
+    """
+    Streams one JSON result line per query line, in input order.
+
+    With workers > 1, queries run on a thread pool with at most 'workers' * 4
+    in flight, and a writer thread emits each result as soon as every earlier
+    one is done. Queries are dict lookups that hold the GIL, so the threads
+    overlap reading input and writing output rather than the queries
+    themselves.
+
+    Returns False if the output was closed (e.g. piped into 'head') before
+    every result was written; pending queries are then cancelled.
+    """
+    lines = (line for line in lines if line.strip())
+    written = 0
+    start = time.perf_counter()
+
+    def write(result):
+        nonlocal written
+        output.write(result + '\n')
+        output.flush()
+        written += 1
+
+    closed = threading.Event()
+    if workers > 1:
+        in_flight = queue.Queue(maxsize=workers * 4)
+        writer_errors = []
+
+        def write_in_order():
+            # Keeps draining after a failure, so the reader can never block on a full queue
+            while (future := in_flight.get()) is not None:
+                if closed.is_set():
+                    future.cancel()
+                    continue
+                try:
+                    write(future.result())
+                except Exception as e:
+                    writer_errors.append(e)
+                    closed.set()
+
+        writer = threading.Thread(target=write_in_order)
+        writer.start()
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for line in lines:
+                    if closed.is_set():
+                        break
+                    in_flight.put(executor.submit(run_query, line))
+        finally:
+            in_flight.put(None)
+            writer.join()
+        if writer_errors and not isinstance(writer_errors[0], (OSError, ValueError)):
+            raise writer_errors[0]
+    else:
+        try:
+            for line in lines:
+                write(run_query(line))
+        except (OSError, ValueError):  # BrokenPipeError, or writing to a closed file
+            closed.set()
+
+    elapsed = time.perf_counter() - start
+    rate = written / elapsed if elapsed > 0 else float('inf')
+    print(f"Executed {written} queries in {elapsed:.3f}s ({rate:.0f} queries/s)", file=sys.stderr)
+    if closed.is_set():
+        print("Output closed before all results were written; stopped.", file=sys.stderr)
+    return not closed.is_set()
 
 # Interactive menu
 def main():
@@ -122,9 +290,10 @@ def main():
         print("2. Show most played matchups and win rates")
         print("3. Sort players by clutch factor")
         print("4. Compare straight game win rate to normal win rate")
-        print("5. Exit")
+        print("5. Show head-to-head record")
+        print("6. Exit")
         choice = input("Enter your choice: ").strip()
-        
+
         if choice == '1':
             stat = input("Enter the statistic name to sort by: ").strip()
             ascending_input = input("Sort ascending? (yes/no): ").strip().lower()
@@ -157,10 +326,32 @@ def main():
                 top_n = 10
             compare_straight_vs_normal_win_rate(ascending=ascending, top_n=top_n)
         elif choice == '5':
+            player1 = input("Enter the first player's name: ").strip()
+            player2 = input("Enter the second player's name: ").strip()
+            show_head_to_head(player1, player2)
+        elif choice == '6':
             print("Exiting the query tool.")
             break
         else:
             print("Invalid choice. Please try again.")
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Player stats query tool (interactive menu or JSON-lines batch mode).")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="Read JSON-lines query specs from FILE ('-' for stdin) and write JSON-lines results")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Threads for batch queries; overlaps reading and writing, the queries themselves hold the GIL")
+    args = parser.parse_args()
+
+    if args.batch:
+        if args.batch == '-':
+            completed = run_batch(sys.stdin, args.workers)
+        else:
+            with open(args.batch, 'r') as f:
+                completed = run_batch(f, args.workers)
+        if not completed:
+            # stdout is gone; point it at devnull so the interpreter's final flush cannot fail again
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(1)
+    else:
+        main()
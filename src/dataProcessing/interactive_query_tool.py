@@ -5,7 +5,18 @@ from tabulate import tabulate
 import plotly.express as px
 import numpy as np
 import joblib
-from predictor import predict_match_outcome
+from datetime import datetime
+from predictor import predict_match_outcome, build_match_feature_vector, X as training_features, model as prediction_model
+from bootstrap import ENSEMBLE_PATH, load_ensemble, matches_model, symmetric_interval
+from live_bracket import LIVE_STATE_PATH, load_snapshot
+from scenes import CROSS_SCENE_TABLE_PATH, SCENES_DIR
+from set_table import set_table_from_records, load_set_table, load_name_mappings
+from player_search import build_player_index
+from opponent_graph import compute_graph_metrics, GRAPH_METRIC_COLUMNS
+from payloads import (
+    DEFAULT_DISPLAY_COLUMNS, displayable_columns, project_top_players,
+    to_arrow_payload, payload_nbytes, bar_figure_spec
+)
 
 # ---------------------------
 # Custom CSS to Adjust Table Spacing
@@ -41,6 +52,14 @@ inject_css()
 # Data Loading and Preprocessing
 # ---------------------------
 
+def add_derived_stats(player_df):
+    # Calculate clutch factor and straight vs normal win rate differences
+    player_df['clutchFactor'] = (
+        (player_df['winRateDecidingGames'] - player_df['overallWinRate']) / player_df['overallWinRate']
+    ) * np.log((player_df['overallWinRate']) / 100) * 100
+    player_df['straightVsOverall'] = player_df['winRateStraightMatches'] / player_df['overallWinRate']
+    return player_df
+
 @st.cache_data  # Updated cache decorator
 def load_data(player_data_path, name_mappings_path, matches_path):
     # Load player data
@@ -79,45 +98,94 @@ def load_data(player_data_path, name_mappings_path, matches_path):
             continue
         player_df[col] = pd.to_numeric(player_df[col], errors='coerce')
     
-    player_df = player_df.fillna(0)
-    
-    # Calculate clutch factor and straight vs normal win rate differences
-    player_df['clutchFactor'] = (
-        (player_df['winRateDecidingGames'] - player_df['overallWinRate']) / player_df['overallWinRate']
-    ) * np.log((player_df['overallWinRate']) / 100) * 100
-    player_df['straightVsOverall'] = player_df['winRateStraightMatches'] / player_df['overallWinRate']
+    player_df = add_derived_stats(player_df.fillna(0))
     
-    # Load match data
+    # Load match data: one row per set with canonical names and its scene
     with open(matches_path, 'r') as f:
         matches = json.load(f)
     
-    matches_df = pd.DataFrame(matches)
+    matches_df = set_table_from_records(matches, name_mappings)
     
-    # Normalize player names in matches
-    matches_df['winnerName'] = matches_df['winnerName'].apply(lambda x: name_mappings.get(x, x))
-    matches_df['loserName'] = matches_df['loserName'].apply(lambda x: name_mappings.get(x, x))
+    # Add strength-of-schedule metrics from the sparse opponent graph
+    graph_metrics = compute_graph_metrics(matches_df)
+    player_df = player_df.join(graph_metrics)
+    player_df[GRAPH_METRIC_COLUMNS] = player_df[GRAPH_METRIC_COLUMNS].fillna(0)
+    
+    # Scenes each player attended, from the cross-scene table built by scenes.py
+    if CROSS_SCENE_TABLE_PATH.exists():
+        scene_table = pd.read_json(CROSS_SCENE_TABLE_PATH, orient='index')
+        player_df = player_df.join(scene_table[['scenesAttended', 'scenes']])
+        player_df['scenesAttended'] = player_df['scenesAttended'].fillna(0)
+        player_df['scenes'] = player_df['scenes'].apply(lambda scenes: scenes if isinstance(scenes, list) else [])
     
     return player_df, matches_df, name_mappings
 
+@st.cache_data
+def load_scene_table(scene_table_path):
+    # One scene's own player table, written by scenes.py
+    scene_df = pd.read_json(scene_table_path, orient='index')
+    scene_df.index.name = 'Player'
+    return add_derived_stats(scene_df)
+
+@st.cache_resource
+def load_search_index(name_mappings_path, matches_path):
+    name_mappings = load_name_mappings(name_mappings_path)
+    return build_player_index(load_set_table(matches_path, name_mappings), name_mappings)
+
+@st.cache_resource
+def load_prediction_ensemble():
+    # Built by bootstrap.py; ignored if it was fitted around a different model or feature set
+    if not ENSEMBLE_PATH.exists():
+        return None
+    ensemble, columns, fingerprint = load_ensemble()
+    if columns != training_features.columns.tolist():
+        return None
+    if fingerprint is None or not matches_model(fingerprint, prediction_model):
+        return None
+    return ensemble
+
+@st.cache_data(max_entries=1)
+def load_live_state(snapshot_mtime):
+    # Keyed by the snapshot's modification time, so each new set from live_bracket.py is picked up;
+    # only the latest snapshot is kept, older ones would never be read again
+    return load_snapshot(LIVE_STATE_PATH)
+
+def player_options(search_index, query, player_names):
+    # Search-as-you-type: an empty query lists every player
+    if not query.strip():
+        return player_names
+    known = set(player_names)
+    matches = [name for name in search_index.search(query, limit=20) if name in known]
+    return matches or player_names
+
 # ---------------------------
 # Define Functions for Queries
 # ---------------------------
 
-def sort_players_by_stat(player_df, stat_name, ascending=False, top_n=10):
+# The filtered frame is not hashed (leading underscore); the filters tuple
+# identifies it instead, so repeat clicks skip projection and figure building.
+@st.cache_data
+def cached_top_players(_player_df, stat_name, ascending, top_n, filters, extra_columns):
+    top_df = project_top_players(_player_df, stat_name, ascending, top_n, extra_columns)
+    return to_arrow_payload(top_df)
+
+@st.cache_data
+def cached_figure_spec(_player_df, stat_name, ascending, top_n, filters):
+    top_df = project_top_players(_player_df, stat_name, ascending, top_n)
+    return bar_figure_spec(top_df, stat_name, top_n)
+
+def sort_players_by_stat(player_df, stat_name, ascending=False, top_n=10, filters=(), extra_columns=()):
     if stat_name not in player_df.columns:
         st.error(f"Statistic '{stat_name}' not found.")
         return
-    sorted_df = player_df.sort_values(by=stat_name, ascending=ascending).head(top_n)
     
-    # Reorder columns: move stat_name to the first column
-    columns = [stat_name] + [col for col in sorted_df.columns if col != stat_name]
-    sorted_df = sorted_df[columns]
-    
-    st.dataframe(sorted_df)
+    # Only the projected top-N rows are serialized and sent to the browser
+    payload = cached_top_players(player_df, stat_name, ascending, top_n, filters, tuple(extra_columns))
+    st.dataframe(payload)
+    st.caption(f"Payload: {payload_nbytes(payload) / 1024:.1f} KB")
     
     # Add a bar chart
-    fig = px.bar(sorted_df, x=sorted_df.index, y=stat_name, title=f"Top {top_n} Players by {stat_name}")
-    st.plotly_chart(fig)
+    st.plotly_chart(cached_figure_spec(player_df, stat_name, ascending, top_n, filters))
 
 def get_most_played_matchups(matches_df, name_mappings, top_n=10):
     # Create a consistent representation for matchups
@@ -212,6 +280,7 @@ def main():
     matches_path = 'src/data/matches.json'
     
     player_df, matches_df, name_mappings = load_data(player_data_path, name_mappings_path, matches_path)
+    search_index = load_search_index(name_mappings_path, matches_path)
     
     # Load the trained model
     try:
@@ -225,15 +294,31 @@ def main():
     st.sidebar.title("Menu")
     option = st.sidebar.selectbox(
         "Choose an action",
-        ("AI Match Outcome Prediction", "Sort Players by Statistic", "Most Played Matchups")
+        ("AI Match Outcome Prediction", "Sort Players by Statistic", "Most Played Matchups", "Live Bracket")
     )
     
     # Sidebar Filters
     st.sidebar.markdown("---")
     st.sidebar.header("🔧 Filters")
     
+    # Scene view (available once scenes.py has built the scene tables). One
+    # scene shows that scene's own stats; several scenes list the players who
+    # attended any of them, with their stats across all scenes.
+    selected_scenes = []
+    stats_df = player_df
+    scene_view = "All scenes"
+    if 'scenes' in player_df.columns:
+        scene_options = sorted({scene for scenes in player_df['scenes'] for scene in scenes})
+        selected_scenes = st.sidebar.multiselect("Scenes", options=scene_options)
+    if len(selected_scenes) == 1 and (SCENES_DIR / f'{selected_scenes[0]}.json').exists():
+        stats_df = load_scene_table(str(SCENES_DIR / f'{selected_scenes[0]}.json'))
+        scene_view = f"Stats from {selected_scenes[0]} sets only"
+    elif selected_scenes:
+        stats_df = player_df[player_df['scenes'].apply(lambda scenes: bool(set(scenes) & set(selected_scenes)))]
+        scene_view = f"Players who attended {', '.join(selected_scenes)} (stats across all scenes)"
+    
     # Identify numeric columns for filtering
-    numeric_columns = player_df.select_dtypes(include=['number']).columns.tolist()
+    numeric_columns = stats_df.select_dtypes(include=['number']).columns.tolist()
     # Remove index name if present
     if 'Player' in numeric_columns:
         numeric_columns.remove('Player')
@@ -251,26 +336,28 @@ def main():
     for stat in selected_filters:
         min_val = st.sidebar.number_input(
             f"Minimum {stat}", 
-            value=float(player_df[stat].min()), 
-            min_value=float(player_df[stat].min()), 
-            max_value=float(player_df[stat].max()), 
+            value=float(stats_df[stat].min()), 
+            min_value=float(stats_df[stat].min()), 
+            max_value=float(stats_df[stat].max()), 
             step=1.0,
             key=f"min_{stat}"
         )
         max_val = st.sidebar.number_input(
             f"Maximum {stat}", 
-            value=float(player_df[stat].max()), 
-            min_value=float(player_df[stat].min()), 
-            max_value=float(player_df[stat].max()), 
+            value=float(stats_df[stat].max()), 
+            min_value=float(stats_df[stat].min()), 
+            max_value=float(stats_df[stat].max()), 
             step=1.0,
             key=f"max_{stat}"
         )
         filter_criteria[stat] = (min_val, max_val)
     
     # Apply filters
-    filtered_df = player_df.copy()
+    filtered_df = stats_df.copy()
     for stat, (min_val, max_val) in filter_criteria.items():
         filtered_df = filtered_df[(filtered_df[stat] >= min_val) & (filtered_df[stat] <= max_val)]
+    if selected_scenes:
+        matches_df = matches_df[matches_df['scene'].isin(selected_scenes)].copy()
     
     # Sidebar About Section (Moved below Filters)
     st.sidebar.markdown("---")
@@ -293,9 +380,15 @@ def main():
         # Get the list of player names for validation
         player_names = player_df.index.tolist()
         
-        # Text input fields for player names
-        player1_input = st.selectbox("Enter Player 1 Name", options=player_names, key="player1_input")
-        player2_input = st.selectbox("Enter Player 2 Name", options=player_names, key="player2_input")
+        # Fuzzy search boxes narrow down the player selectors
+        player1_search = st.text_input("Search Player 1", key="player1_search")
+        player1_input = st.selectbox(
+            "Enter Player 1 Name", options=player_options(search_index, player1_search, player_names), key="player1_input"
+        )
+        player2_search = st.text_input("Search Player 2", key="player2_search")
+        player2_input = st.selectbox(
+            "Enter Player 2 Name", options=player_options(search_index, player2_search, player_names), key="player2_input"
+        )
         
         # Input field for match format
         match_formats = ["Best of 3", "Best of 5"]
@@ -319,18 +412,35 @@ def main():
                     probability2 = (1 - predict_match_outcome(player2, player1, selected_match_format, model))
                     realProbability = (probability1 + probability2) / 2
                     st.success(f"**Predicted probability of {player1} winning: {realProbability * 100:.2f}%**")
+                    
+                    ensemble = load_prediction_ensemble()
+                    if ensemble is not None:
+                        forward = build_match_feature_vector(player1, player2, selected_match_format)
+                        reverse = build_match_feature_vector(player2, player1, selected_match_format)
+                        lower, _, upper = symmetric_interval(
+                            ensemble, forward.to_numpy(dtype=float), reverse.to_numpy(dtype=float), level=0.9
+                        )
+                        st.info(f"90% interval from {len(ensemble)} bootstrap models: {lower * 100:.1f}% – {upper * 100:.1f}%")
+                    else:
+                        st.caption("Run bootstrap.py to show a confidence interval for this prediction.")
                 else:
                     st.error("Prediction model not available.")
 
     elif option == "Sort Players by Statistic":
             st.header("🔍 Sort Players by Statistic")
-            stat_options = player_df.columns.tolist()
+            st.caption(scene_view)
+            stat_options = displayable_columns(filtered_df)
             selected_stat = st.selectbox("Select Statistic", stat_options)
             sort_order = st.radio("Sort Order", ("Descending", "Ascending"))
             top_n = st.number_input("Number of Players to Display", min_value=1, max_value=len(filtered_df), value=10)
+            extra_columns = st.multiselect(
+                "Extra columns to display",
+                options=[col for col in stat_options if col not in DEFAULT_DISPLAY_COLUMNS]
+            )
             ascending = True if sort_order == "Ascending" else False
+            filters = (tuple(sorted(filter_criteria.items())), tuple(sorted(selected_scenes)))
             if st.button("Sort"):
-                sort_players_by_stat(filtered_df, selected_stat, ascending, top_n)
+                sort_players_by_stat(filtered_df, selected_stat, ascending, top_n, filters, extra_columns)
 
     elif option == "Most Played Matchups":
         st.header("📊 Most Played Matchups and Win Rates")
@@ -339,6 +449,43 @@ def main():
         )
         if st.button("Show Matchups"):
             get_most_played_matchups(matches_df, name_mappings, top_n)
+
+    elif option == "Live Bracket":
+        st.header("📡 Live Bracket")
+        if not LIVE_STATE_PATH.exists():
+            st.info("Start live_bracket.py to stream results from the current bracket.")
+            return
+        
+        snapshot = load_live_state(LIVE_STATE_PATH.stat().st_mtime)
+        live_table = snapshot['table']
+        last_set = datetime.fromtimestamp(snapshot['updatedAt']).strftime('%Y-%m-%d %H:%M') if snapshot['updatedAt'] else "n/a"
+        st.caption(f"{snapshot['setsApplied']} sets applied, last set completed {last_set}")
+        if snapshot.get('pollError'):
+            st.warning(f"live_bracket.py cannot reach start.gg and keeps retrying; results may be stale. Last error: {snapshot['pollError']}")
+        if st.button("Refresh"):
+            st.rerun()
+        
+        # Upcoming set prediction straight from the cached win-probability matrix
+        live_players = live_table.index.tolist()
+        live_search1 = st.text_input("Search Player 1", key="live_player1_search")
+        live_player1 = st.selectbox(
+            "Player 1", options=player_options(search_index, live_search1, live_players), key="live_player1"
+        )
+        live_search2 = st.text_input("Search Player 2", key="live_player2_search")
+        live_options2 = player_options(search_index, live_search2, live_players)
+        # Default to the second option so the page does not open on a player against themselves
+        live_player2 = st.selectbox(
+            "Player 2", options=live_options2, index=min(1, len(live_options2) - 1), key="live_player2"
+        )
+        if live_player1 == live_player2:
+            st.error("Please select two different players.")
+        else:
+            probability = snapshot['winProbability'][
+                live_table.index.get_loc(live_player1), live_table.index.get_loc(live_player2)
+            ]
+            st.success(f"**Live probability of {live_player1} winning: {probability * 100:.2f}%**")
+        
+        st.dataframe(live_table.sort_values('liveElo', ascending=False).head(25))
     
 if __name__ == '__main__':
     main()
@@ -0,0 +1,390 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+
+import joblib
+import numpy as np
+import pandas as pd
+import requests
+
+from set_table import DATA_DIR, MATCHES_PATH, canonical_name, load_name_mappings
+from shared import ELO_START, elo_expected, head_to_head, record_set
+
+LIVE_STATE_PATH = DATA_DIR / 'liveState.pkl'
+STARTGG_URL = 'https://api.start.gg/gql/alpha'
+
+RECENT_WINDOW = 10  # sets used for the windowed win rate
+MAX_BACKOFF = 600.0  # longest wait between polls while start.gg rate-limits us
+
+# ---------------------------
+# Event-Sourced State
+# ---------------------------
+
+class LiveState:
+    """
+    In-memory player state built by applying completed sets one at a time.
+
+    Counters, head-to-head aggregates, the windowed win rate and Elo ratings
+    are each updated in O(1) per set. The cached win-probability matrix only
+    has the rows and columns of the two players in the set recomputed.
+    """
+
+    def __init__(self, name_mappings=None, capacity=256):
+        self.name_mappings = name_mappings or {}
+        self.players = []
+        self.player_ids = {}
+        self.seen_sets = set()
+        self.sets_applied = 0
+        self.updated_at = None
+        self.poll_error = None  # last failed poll, shown by the app until a poll succeeds
+
+        self.played = np.zeros(capacity)
+        self.wins = np.zeros(capacity)
+        self.games_won = np.zeros(capacity)
+        self.games_lost = np.zeros(capacity)
+        self.elo = np.full(capacity, ELO_START)
+        self.recent = []  # per player: deque of the last RECENT_WINDOW results
+        self.recent_wins = np.zeros(capacity)
+        self.h2h = {}  # (low id, high id) -> [sets, sets won by low id]
+        self.win_probability = np.full((capacity, capacity), 0.5)
+
+    def _grow(self):
+        capacity = len(self.played) * 2
+        for name in ('played', 'wins', 'games_won', 'games_lost', 'recent_wins'):
+            setattr(self, name, np.concatenate([getattr(self, name), np.zeros(len(getattr(self, name)))]))
+        self.elo = np.concatenate([self.elo, np.full(len(self.elo), ELO_START)])
+        matrix = np.full((capacity, capacity), 0.5)
+        n = len(self.players)
+        matrix[:n, :n] = self.win_probability[:n, :n]
+        self.win_probability = matrix
+
+    def player_id(self, raw_name):
+        name = canonical_name(raw_name, self.name_mappings)
+        player_id = self.player_ids.get(name)
+        if player_id is None:
+            if len(self.players) == len(self.played):
+                self._grow()
+            player_id = len(self.players)
+            self.player_ids[name] = player_id
+            self.players.append(name)
+            self.recent.append(deque(maxlen=RECENT_WINDOW))
+        return player_id
+
+    def _record_recent(self, player_id, won):
+        window = self.recent[player_id]
+        if len(window) == window.maxlen:
+            self.recent_wins[player_id] -= window[0]
+        window.append(won)
+        self.recent_wins[player_id] += won
+
+    def _refresh_probabilities(self, player_id):
+        n = len(self.players)
+        row = elo_expected(self.elo[player_id], self.elo[:n])
+        self.win_probability[player_id, :n] = row
+        self.win_probability[:n, player_id] = 1.0 - row
+
+    def apply_set(self, match):
+        """
+        Applies one completed set (matches.json record). Returns False if the
+        set was already applied, so re-polling the same sets is harmless.
+        """
+        if match['setId'] in self.seen_sets:
+            return False
+        self.seen_sets.add(match['setId'])
+
+        winner = self.player_id(match['winnerName'])
+        loser = self.player_id(match['loserName'])
+        if winner == loser:
+            return False
+        winner_games = max(match.get('winnerScore') or 0, 0)
+        loser_games = max(match.get('loserScore') or 0, 0)
+
+        # Counters
+        self.played[winner] += 1
+        self.played[loser] += 1
+        self.wins[winner] += 1
+        self.games_won[winner] += winner_games
+        self.games_lost[winner] += loser_games
+        self.games_won[loser] += loser_games
+        self.games_lost[loser] += winner_games
+
+        # Windowed win rate
+        self._record_recent(winner, 1)
+        self._record_recent(loser, 0)
+
+        # Ratings, head-to-head and the affected rows of the win-probability matrix
+        record_set(self.elo, self.h2h, winner, loser)
+        self._refresh_probabilities(winner)
+        self._refresh_probabilities(loser)
+
+        self.sets_applied += 1
+        self.updated_at = match.get('completedAt') or time.time()
+        return True
+
+    def head_to_head(self, player1, player2):
+        wins, sets = head_to_head(self.h2h, self.player_ids[player1], self.player_ids[player2])
+        return wins, sets - wins
+
+    def snapshot(self):
+        """
+        Read-only view for the Streamlit app: player table plus the cached
+        win-probability matrix.
+        """
+        n = len(self.players)
+        played = self.played[:n]
+        window_sizes = np.array([len(window) for window in self.recent])
+        table = pd.DataFrame({
+            'liveElo': self.elo[:n],
+            'setsPlayed': played,
+            'setWins': self.wins[:n],
+            'winRate': np.divide(self.wins[:n], played, out=np.zeros(n), where=played > 0) * 100,
+            f'winRateLast{RECENT_WINDOW}': np.divide(
+                self.recent_wins[:n], window_sizes, out=np.zeros(n), where=window_sizes > 0) * 100,
+            'gamesWon': self.games_won[:n],
+            'gamesLost': self.games_lost[:n],
+        }, index=pd.Index(self.players, name='Player'))
+        return {
+            'table': table,
+            'winProbability': self.win_probability[:n, :n].copy(),
+            'setsApplied': self.sets_applied,
+            'updatedAt': self.updated_at,
+            'pollError': self.poll_error,
+        }
+
+def save_snapshot(state, path=LIVE_STATE_PATH):
+    # Write then rename so the app never reads a half-written file
+    tmp_path = path.with_suffix('.tmp')
+    joblib.dump(state.snapshot(), tmp_path)
+    os.replace(tmp_path, path)
+
+def load_snapshot(path=LIVE_STATE_PATH):
+    return joblib.load(path)
+
+# ---------------------------
+# Set Sources
+# ---------------------------
+
+class ReplaySource:
+    """
+    Stands in for the start.gg API: serves sets from a matches.json-style
+    file (JSON array or JSON lines) in completion order, a few per poll.
+    """
+
+    def __init__(self, path, sets_per_poll=10):
+        with open(path, 'r') as f:
+            text = f.read()
+        records = json.loads(text) if text.lstrip().startswith('[') else [
+            json.loads(line) for line in text.splitlines() if line.strip()
+        ]
+        self.records = sorted(records, key=lambda match: match.get('completedAt') or 0)
+        self.sets_per_poll = sets_per_poll
+        self.position = 0
+
+    def poll(self):
+        batch = self.records[self.position:self.position + self.sets_per_poll]
+        self.position += len(batch)
+        return batch
+
+    @property
+    def exhausted(self):
+        return self.position >= len(self.records)
+
+class StartGGError(RuntimeError):
+    """
+    start.gg answered, but with GraphQL errors instead of data.
+    """
+
+class StartGGSource:
+    """
+    Polls start.gg for sets of one event that completed since the last poll.
+    """
+
+    QUERY = """
+    query LiveSets($eventId: ID!, $page: Int!, $perPage: Int!, $updatedAfter: Timestamp) {
+      event(id: $eventId) {
+        name
+        startAt
+        tournament { slug }
+        sets(page: $page, perPage: $perPage, sortType: RECENT,
+             filters: { state: [3], updatedAfter: $updatedAfter }) {
+          pageInfo { totalPages }
+          nodes {
+            id
+            completedAt
+            slots {
+              entrant { id name }
+              standing { placement stats { score { value } } }
+            }
+          }
+        }
+      }
+    }
+    """
+
+    def __init__(self, event_id, api_key=None, per_page=50):
+        self.event_id = event_id
+        self.api_key = api_key or os.environ.get('STARTGG_KEY')
+        if not self.api_key:
+            raise ValueError("No start.gg API key: set the STARTGG_KEY environment variable.")
+        self.per_page = per_page
+        self.updated_after = None
+        self.exhausted = False  # a live event never runs out of polls
+
+    def _request(self, page):
+        response = requests.post(
+            STARTGG_URL,
+            json={'query': self.QUERY, 'variables': {
+                'eventId': self.event_id, 'page': page, 'perPage': self.per_page,
+                'updatedAfter': self.updated_after,
+            }},
+            headers={'Authorization': f'Bearer {self.api_key}'},
+            timeout=30,
+        )
+        response.raise_for_status()
+        data = response.json()
+        if data.get('errors'):
+            raise StartGGError(f"start.gg returned errors: {data['errors']}")
+        return data['data']['event']
+
+    def poll(self):
+        poll_started = int(time.time())
+        matches = []
+        page = 1
+        while True:
+            event = self._request(page)
+            for node in event['sets']['nodes']:
+                match = self._to_match(node, event)
+                if match is not None:
+                    matches.append(match)
+            if page >= event['sets']['pageInfo']['totalPages']:
+                break
+            page += 1
+        # Only advanced once every page arrived, so a failed poll is retried in full
+        self.updated_after = poll_started
+        return matches
+
+    def _to_match(self, node, event):
+        # Same record shape processData.js writes to matches.json
+        slots = node.get('slots') or []
+        if len(slots) != 2 or not all(slot.get('standing') and slot.get('entrant') for slot in slots):
+            return None
+        winner, loser = sorted(slots, key=lambda slot: slot['standing']['placement'])
+        winner_score = winner['standing']['stats']['score']['value']
+        loser_score = loser['standing']['stats']['score']['value']
+        return {
+            'setId': node['id'],
+            'tournamentName': event['tournament']['slug'].split('/')[-1],
+            'eventName': event['name'],
+            'eventId': self.event_id,
+            'eventStartAt': event['startAt'],
+            'completedAt': node['completedAt'],
+            'winnerId': winner['entrant']['id'],
+            'winnerName': winner['entrant']['name'],
+            'loserId': loser['entrant']['id'],
+            'loserName': loser['entrant']['name'],
+            'winnerScore': winner_score,
+            'loserScore': loser_score,
+            'bestOf': 'Best of 5' if max(winner_score or 0, loser_score or 0) >= 3 else 'Best of 3',
+        }
+
+# ---------------------------
+# Live Loop
+# ---------------------------
+
+def seed_state(name_mappings, matches_path=MATCHES_PATH):
+    # Historical sets give every known player a rating before the bracket starts
+    state = LiveState(name_mappings)
+    with open(matches_path, 'r') as f:
+        for match in sorted(json.load(f), key=lambda match: match.get('completedAt') or 0):
+            state.apply_set(match)
+    return state
+
+def retry_delay(error, interval, previous_delay):
+    """
+    Seconds to wait after a failed poll: the normal interval, or an
+    exponential backoff (honouring Retry-After) while rate-limited.
+    """
+    response = getattr(error, 'response', None)
+    if response is None or response.status_code != 429:
+        return interval
+    retry_after = response.headers.get('Retry-After', '')
+    if retry_after.isdigit():
+        return min(max(float(retry_after), interval), MAX_BACKOFF)
+    return min(max(previous_delay * 2, interval), MAX_BACKOFF)
+
+def run_live(source, state, interval=30.0, snapshot_path=LIVE_STATE_PATH):
+    delay = interval
+    while True:
+        try:
+            matches = source.poll()
+        except (requests.RequestException, StartGGError) as e:
+            # Keep the state and the poll cursor, tell the app, and try again later
+            delay = retry_delay(e, interval, delay)
+            print(f"Poll failed, retrying in {delay:.0f}s: {e}", file=sys.stderr)
+            if state.poll_error is None:
+                state.poll_error = str(e)
+                save_snapshot(state, snapshot_path)
+            time.sleep(delay)
+            continue
+
+        delay = interval
+        applied = sum(state.apply_set(match) for match in matches)
+        if applied or state.poll_error is not None:
+            state.poll_error = None
+            save_snapshot(state, snapshot_path)
+        if applied:
+            print(f"Applied {applied} new sets ({state.sets_applied} total)")
+        if source.exhausted:
+            break
+        time.sleep(interval)
+
+def benchmark_replay(matches_path=MATCHES_PATH, name_mappings=None, repeats=3):
+    """
+    Replays matches.json into a fresh state and reports sets applied per second.
+    """
+    with open(matches_path, 'r') as f:
+        matches = sorted(json.load(f), key=lambda match: match.get('completedAt') or 0)
+    best = float('inf')
+    for _ in range(repeats):
+        state = LiveState(name_mappings)
+        start = time.perf_counter()
+        for match in matches:
+            state.apply_set(match)
+        best = min(best, time.perf_counter() - start)
+    return len(matches), best
+
+def main():
+    parser = argparse.ArgumentParser(description="Live bracket mode: apply completed sets to in-memory state as they finish.")
+    source_group = parser.add_mutually_exclusive_group(required=True)
+    source_group.add_argument('--event-id', type=int, help="start.gg event ID to poll")
+    source_group.add_argument('--replay', help="Local matches.json-style file standing in for the API")
+    source_group.add_argument('--benchmark', action='store_true', help="Replay matches.json and report sets applied per second")
+    parser.add_argument('--interval', type=float, default=30.0, help="Seconds between polls")
+    parser.add_argument('--sets-per-poll', type=int, default=10, help="Sets served per poll in replay mode")
+    args = parser.parse_args()
+
+    name_mappings = load_name_mappings()
+
+    if args.benchmark:
+        count, seconds = benchmark_replay(name_mappings=name_mappings)
+        print(f"Applied {count} sets in {seconds:.3f}s ({count / seconds:.0f} sets/s)")
+        return
+
+    if args.replay:
+        source = ReplaySource(args.replay, args.sets_per_poll)
+    else:
+        try:
+            source = StartGGSource(args.event_id)
+        except ValueError as e:
+            parser.error(str(e))
+
+    state = seed_state(name_mappings)
+    print(f"Seeded live state with {state.sets_applied} historical sets")
+    save_snapshot(state)
+    run_live(source, state, args.interval)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from set_table import load_set_table, load_name_mappings
+
+# Columns added to the player table by compute_graph_metrics
+GRAPH_METRIC_COLUMNS = [
+    'pageRankDominance',
+    'opponentAdjustedWinRate',
+    'bradleyTerryStrength',
+    'strengthOfSchedule',
+    'winRateAgainstHigherRated',
+    'winRateAgainstLowerRated',
+]
+
+# ---------------------------
+# Graph Construction
+# ---------------------------
+
+def build_player_graph(sets_df, players=None):
+    """
+    Builds the sparse opponent graph from a set table.
+
+    Parameters:
+    - sets_df (DataFrame): One row per set with canonical 'winnerName', 'loserName',
+      'winnerScore' and 'loserScore' (see set_table.load_set_table).
+    - players (list, optional): Fixed player ordering. Defaults to every player in sets_df.
+
+    Returns:
+    - players (Index): Player name for each row/column of the matrices.
+    - set_wins (csr_matrix): set_wins[i, j] = sets player i won against player j.
+    - game_wins (csr_matrix): game_wins[i, j] = games player i won against player j.
+    """
+    if players is None:
+        players = pd.Index(pd.unique(pd.concat([sets_df['winnerName'], sets_df['loserName']])))
+    else:
+        players = pd.Index(players)
+    n = len(players)
+
+    winners = players.get_indexer(sets_df['winnerName'])
+    losers = players.get_indexer(sets_df['loserName'])
+    known = (winners >= 0) & (losers >= 0)
+    winners, losers = winners[known], losers[known]
+    winner_games = sets_df['winnerScore'].to_numpy(dtype=float)[known]
+    loser_games = sets_df['loserScore'].to_numpy(dtype=float)[known]
+
+    # Duplicate (row, col) entries are summed on conversion to CSR
+    set_wins = sp.csr_matrix((np.ones(len(winners)), (winners, losers)), shape=(n, n))
+    game_wins = sp.csr_matrix(
+        (np.concatenate([winner_games, loser_games]),
+         (np.concatenate([winners, losers]), np.concatenate([losers, winners]))),
+        shape=(n, n)
+    )
+    set_wins.sum_duplicates()
+    game_wins.sum_duplicates()
+    game_wins.eliminate_zeros()
+    return players, set_wins, game_wins
+
+# ---------------------------
+# Iterative Strength Metrics
+# ---------------------------
+
+def pagerank_dominance(game_wins, damping=0.85, tol=1e-10, max_iter=200):
+    """
+    PageRank over the "lost games to" graph.
+
+    Every player passes their score to the opponents who took games off them,
+    proportionally to the number of games taken. Scores are scaled so that
+    the average player is 1.0.
+    """
+    n = game_wins.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    games_lost = np.asarray(game_wins.sum(axis=0)).ravel()
+    dangling = games_lost == 0
+    inv_lost = np.divide(1.0, games_lost, out=np.zeros(n), where=~dangling)
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        teleport = (damping * rank[dangling].sum() + 1.0 - damping) / n
+        new_rank = damping * (game_wins @ (rank * inv_lost)) + teleport
+        converged = np.abs(new_rank - rank).sum() < tol
+        rank = new_rank
+        if converged:
+            break
+    return rank * n
+
+def opponent_adjusted_win_rate(set_wins, alpha=0.5, tol=1e-8, max_iter=200):
+    """
+    Iterated opponent-adjusted set win rate (in percent).
+
+    Starts from the raw win rate and repeatedly adds alpha times how far the
+    set-weighted average adjusted rate of a player's opponents sits above 50%.
+    alpha < 1 keeps the iteration a contraction, so it always converges.
+    Players with a strong schedule can end up above 100.
+    """
+    n = set_wins.shape[0]
+    sets_played = set_wins + set_wins.T
+    played = np.asarray(sets_played.sum(axis=1)).ravel()
+    wins = np.asarray(set_wins.sum(axis=1)).ravel()
+    raw = np.divide(wins, played, out=np.zeros(n), where=played > 0) * 100
+
+    # Row-normalized opponent matrix: averaging operator over each player's sets
+    inv_played = sp.diags(np.divide(1.0, played, out=np.zeros(n), where=played > 0))
+    opponent_mean = (inv_played @ sets_played).tocsr()
+    has_sets = played > 0
+
+    rating = raw.copy()
+    for _ in range(max_iter):
+        new_rating = raw + alpha * (opponent_mean @ rating - 50.0) * has_sets
+        converged = np.abs(new_rating - rating).max(initial=0.0) < tol
+        rating = new_rating
+        if converged:
+            break
+    return rating
+
+def bradley_terry_strengths(set_wins, prior=1.0, tol=1e-8, max_iter=500):
+    """
+    Bradley-Terry log-strengths fitted with the MM algorithm (Hunter, 2004).
+
+    Every player gets 'prior' virtual wins and losses against a reference
+    player of strength 1 so undefeated / winless players stay finite.
+    Returned strengths are natural-log scale and centered on 0; the
+    predicted probability that i beats j is 1 / (1 + exp(s_j - s_i)).
+    """
+    n = set_wins.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    sets_played = (set_wins + set_wins.T).tocoo()
+    rows, cols, counts = sets_played.row, sets_played.col, sets_played.data
+    wins = np.asarray(set_wins.sum(axis=1)).ravel() + prior
+
+    strength = np.ones(n)
+    for _ in range(max_iter):
+        pair_terms = counts / (strength[rows] + strength[cols])
+        denom = np.bincount(rows, weights=pair_terms, minlength=n) + 2 * prior / (strength + 1.0)
+        new_strength = wins / denom
+        new_strength /= np.exp(np.log(new_strength).mean())
+        converged = np.abs(np.log(new_strength) - np.log(strength)).max() < tol
+        strength = new_strength
+        if converged:
+            break
+    return np.log(strength)
+
+def rated_opponent_stats(set_wins, ratings):
+    """
+    Strength of schedule and win rates against higher / lower rated opponents.
+
+    'Higher rated' is decided by the supplied ratings (e.g. Bradley-Terry
+    strengths) rather than by raw win rate.
+    """
+    n = set_wins.shape[0]
+    sets_played = (set_wins + set_wins.T).tocoo()
+    rows, cols, counts = sets_played.row, sets_played.col, sets_played.data
+    # Wins for each (row, col) entry of sets_played, aligned by position
+    wins = np.asarray(set_wins[rows, cols]).ravel()
+
+    played = np.bincount(rows, weights=counts, minlength=n)
+    schedule = np.divide(
+        np.bincount(rows, weights=counts * ratings[cols], minlength=n), played,
+        out=np.zeros(n), where=played > 0
+    )
+
+    def masked_win_rate(mask):
+        total = np.bincount(rows[mask], weights=counts[mask], minlength=n)
+        won = np.bincount(rows[mask], weights=wins[mask], minlength=n)
+        return np.divide(won, total, out=np.zeros(n), where=total > 0) * 100
+
+    higher = ratings[cols] > ratings[rows]
+    return schedule, masked_win_rate(higher), masked_win_rate(~higher)
+
+# ---------------------------
+# Player Table Features
+# ---------------------------
+
+def compute_graph_metrics(sets_df, players=None):
+    """
+    Computes every graph metric for all players at once.
+
+    Returns a DataFrame indexed by player name with GRAPH_METRIC_COLUMNS.
+    """
+    players, set_wins, game_wins = build_player_graph(sets_df, players)
+    strengths = bradley_terry_strengths(set_wins)
+    schedule, vs_higher, vs_lower = rated_opponent_stats(set_wins, strengths)
+    metrics = pd.DataFrame({
+        'pageRankDominance': pagerank_dominance(game_wins),
+        'opponentAdjustedWinRate': opponent_adjusted_win_rate(set_wins),
+        'bradleyTerryStrength': strengths,
+        'strengthOfSchedule': schedule,
+        'winRateAgainstHigherRated': vs_higher,
+        'winRateAgainstLowerRated': vs_lower,
+    }, index=players)
+    metrics.index.name = 'Player'
+    return metrics
+
+if __name__ == '__main__':
+    sets_df = load_set_table(name_mappings=load_name_mappings())
+    metrics = compute_graph_metrics(sets_df)
+    print(metrics.sort_values('bradleyTerryStrength', ascending=False).head(25).to_string())
@@ -0,0 +1,108 @@
+import json
+import time
+
+import pandas as pd
+import plotly.express as px
+import pyarrow as pa
+
+# ---------------------------
+# Column Projection
+# ---------------------------
+
+# Columns shown in the player table unless the user opts into more
+DEFAULT_DISPLAY_COLUMNS = [
+    'totalMatchesPlayed',
+    'overallWinRate',
+    'gameWinRate',
+    'winRateLast3Months',
+    'bradleyTerryStrength',
+    'opponentAdjustedWinRate',
+]
+
+def displayable_columns(player_df):
+    # Nested records (e.g. 'headToHeadRecords') are never sent to the browser
+    return [col for col in player_df.columns if player_df[col].dtype != object]
+
+def project_top_players(player_df, stat_name, ascending=False, top_n=10, extra_columns=()):
+    """
+    Selects the top_n rows by stat_name and only the columns that will be shown.
+
+    The stat comes first, followed by DEFAULT_DISPLAY_COLUMNS and any opt-in
+    extra columns. nlargest / nsmallest avoid sorting the whole table.
+    """
+    top = player_df[stat_name].nsmallest(top_n) if ascending else player_df[stat_name].nlargest(top_n)
+    columns = [stat_name]
+    for col in list(DEFAULT_DISPLAY_COLUMNS) + list(extra_columns):
+        if col in player_df.columns and col not in columns:
+            columns.append(col)
+    return player_df.loc[top.index, columns]
+
+# ---------------------------
+# Serialized Payloads
+# ---------------------------
+
+def to_arrow_payload(df):
+    return pa.Table.from_pandas(df, preserve_index=True)
+
+def payload_nbytes(table):
+    # Size of the Arrow IPC stream, which is what Streamlit sends over the websocket
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().size
+
+def bar_figure_spec(top_df, stat_name, top_n):
+    fig = px.bar(top_df, x=top_df.index, y=stat_name, title=f"Top {top_n} Players by {stat_name}")
+    return fig.to_dict()
+
+# ---------------------------
+# Before / After Measurement
+# ---------------------------
+
+def _stringify_nested(df):
+    # Streamlit falls back to strings for dict columns before Arrow conversion
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].map(lambda value: json.dumps(value) if isinstance(value, dict) else value)
+    return df
+
+def measure_sort_action(player_df, stat_name, ascending=False, top_n=10, extra_columns=()):
+    """
+    Compares one "Sort Players by Statistic" action before and after projection.
+
+    'before' sorts the full table, serializes every column (including nested
+    head-to-head records) and builds the figure from the full frame; 'after'
+    uses project_top_players, to_arrow_payload and bar_figure_spec.
+    """
+    start = time.perf_counter()
+    full = player_df.sort_values(by=stat_name, ascending=ascending).head(top_n)
+    full = full[[stat_name] + [col for col in full.columns if col != stat_name]]
+    before_bytes = payload_nbytes(to_arrow_payload(_stringify_nested(full)))
+    px.bar(full, x=full.index, y=stat_name, title=f"Top {top_n} Players by {stat_name}").to_dict()
+    before_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    top = project_top_players(player_df, stat_name, ascending, top_n, extra_columns)
+    after_bytes = payload_nbytes(to_arrow_payload(top))
+    bar_figure_spec(top, stat_name, top_n)
+    after_seconds = time.perf_counter() - start
+
+    return {
+        'stat': stat_name,
+        'topN': top_n,
+        'beforeBytes': before_bytes,
+        'afterBytes': after_bytes,
+        'beforeSeconds': before_seconds,
+        'afterSeconds': after_seconds,
+    }
+
+if __name__ == '__main__':
+    with open('src/data/playerDataPoints.json', 'r') as f:
+        player_df = pd.DataFrame.from_dict(json.load(f), orient='index')
+    results = [
+        measure_sort_action(player_df, stat, top_n=top_n)
+        for stat in ('overallWinRate', 'totalMatchesPlayed')
+        for top_n in (10, 50)
+    ]
+    print(pd.DataFrame(results).to_string(index=False))
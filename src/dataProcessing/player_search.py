@@ -0,0 +1,216 @@
+import argparse
+import json
+import time
+from collections import defaultdict
+
+import pandas as pd
+
+from set_table import load_set_table, load_name_mappings, normalize_player_name
+
+# ---------------------------
+# Trigram Index
+# ---------------------------
+
+def trigrams(text):
+    # Padding lets short names and name starts produce trigrams of their own
+    padded = f"  {text.lower().strip()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class TrigramIndex:
+    """
+    Character-trigram inverted index over player names.
+
+    Every indexed entry is a (name, canonical player) pair, so raw entrant
+    names resolve to the player they belong to. Lookups only touch the
+    posting lists of the query's trigrams, never the full name list.
+    """
+
+    def __init__(self, entries):
+        # entries: iterable of (name, canonical name)
+        self.names = []
+        self.canonical = []
+        self.sizes = []
+        self.postings = defaultdict(list)
+        seen = set()
+        for name, canonical in entries:
+            if name in seen:
+                continue
+            seen.add(name)
+            entry_id = len(self.names)
+            grams = trigrams(name)
+            self.names.append(name)
+            self.canonical.append(canonical)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.postings[gram].append(entry_id)
+
+    def shared_counts(self, grams):
+        shared = defaultdict(int)
+        for gram in grams:
+            for entry_id in self.postings.get(gram, ()):
+                shared[entry_id] += 1
+        return shared
+
+    def scores(self, query, exclude=()):
+        """
+        Dice similarity between the query and every entry sharing a trigram.
+        """
+        query_grams = trigrams(query)
+        return {
+            entry_id: 2 * count / (len(query_grams) + self.sizes[entry_id])
+            for entry_id, count in self.shared_counts(query_grams).items()
+            if self.canonical[entry_id] not in exclude
+        }
+
+    def search(self, query, limit=10, min_score=0.3):
+        """
+        Typo-tolerant lookup returning up to 'limit' canonical player names.
+
+        Entries are ranked by the share of the query's own trigrams they
+        contain, so a fragment typed mid-name still finds the player; Dice
+        similarity breaks ties and names starting with the query rank first.
+        """
+        lowered = query.lower().strip()
+        if not lowered:
+            return []
+        # Unpadded trigrams match anywhere in a name; very short queries need the padding
+        query_grams = {lowered[i:i + 3] for i in range(len(lowered) - 2)} or trigrams(lowered)
+        best = {}
+        for entry_id, count in self.shared_counts(query_grams).items():
+            containment = count / len(query_grams)
+            if containment < min_score:
+                continue
+            score = containment + 0.1 * 2 * count / (len(query_grams) + self.sizes[entry_id])
+            if self.names[entry_id].lower().startswith(lowered):
+                score += 1.0
+            canonical = self.canonical[entry_id]
+            best[canonical] = max(best.get(canonical, 0.0), score)
+        return sorted(best, key=lambda name: (-best[name], name))[:limit]
+
+def build_player_index(sets_df, name_mappings=None):
+    """
+    Indexes canonical names plus every raw entrant name seen in the set table.
+    """
+    entries = []
+    for canonical in pd.unique(pd.concat([sets_df['winnerName'], sets_df['loserName']])):
+        entries.append((canonical, canonical))
+    for canonical in set((name_mappings or {}).values()):
+        entries.append((canonical, canonical))
+    for raw_col, name_col in (('winnerRawName', 'winnerName'), ('loserRawName', 'loserName')):
+        for raw, canonical in sets_df[[raw_col, name_col]].drop_duplicates().itertuples(index=False):
+            entries.append((raw, canonical))
+    return TrigramIndex(entries)
+
+# ---------------------------
+# Alias Suggestions
+# ---------------------------
+
+def opponent_and_event_sets(sets_df):
+    opponents = defaultdict(set)
+    events = defaultdict(set)
+    for winner, loser, event_id in sets_df[['winnerName', 'loserName', 'eventId']].itertuples(index=False):
+        opponents[winner].add(loser)
+        opponents[loser].add(winner)
+        events[winner].add(event_id)
+        events[loser].add(event_id)
+    return opponents, events
+
+def suggest_aliases(sets_df, name_mappings, min_name_score=0.5, min_score=0.4, candidates_per_name=5):
+    """
+    Suggests nameMappings.json entries for raw names that are not mapped yet.
+
+    Candidates come from the trigram index (no pairwise comparison of all
+    names). Two players who entered the same event are never the same person;
+    the remaining candidates are scored by name similarity and by the Jaccard
+    overlap of the opponents each name has played.
+
+    Each pair of names is suggested once, mapping the name with fewer sets
+    onto the other. Every alias gets a single target and no alias is also a
+    target, so the suggestions never form chains or cycles.
+    """
+    index = build_player_index(sets_df, name_mappings)
+    opponents, events = opponent_and_event_sets(sets_df)
+    set_counts = pd.concat([sets_df['winnerName'], sets_df['loserName']]).value_counts()
+    targets = set(name_mappings.values())
+
+    raw_to_canonical = dict(zip(sets_df['winnerRawName'], sets_df['winnerName']))
+    raw_to_canonical.update(zip(sets_df['loserRawName'], sets_df['loserName']))
+    mapped = set(name_mappings)
+
+    # Unordered pair -> best (score, name score, opponent score) seen from either side
+    pairs = {}
+    for raw, canonical in raw_to_canonical.items():
+        if raw in mapped or normalize_player_name(raw) in mapped:
+            continue
+        name_scores = {}
+        for entry_id, score in index.scores(normalize_player_name(raw), exclude={canonical}).items():
+            if score >= min_name_score:
+                candidate = index.canonical[entry_id]
+                name_scores[candidate] = max(name_scores.get(candidate, 0.0), score)
+
+        ranked = sorted(name_scores.items(), key=lambda item: -item[1])[:candidates_per_name]
+        for candidate, name_score in ranked:
+            if events[canonical] & events[candidate]:
+                continue
+            union = opponents[canonical] | opponents[candidate]
+            opponent_score = len(opponents[canonical] & opponents[candidate]) / len(union) if union else 0.0
+            score = 0.6 * name_score + 0.4 * opponent_score
+            pair = tuple(sorted((canonical, candidate)))
+            if score >= min_score and score > pairs.get(pair, (0.0,))[0]:
+                pairs[pair] = (score, name_score, opponent_score)
+
+    suggestions = []
+    for pair, (score, name_score, opponent_score) in pairs.items():
+        # The name with fewer sets becomes the alias; existing targets stay targets
+        eligible = [name for name in pair if name not in mapped and name not in targets]
+        if not eligible:
+            continue
+        alias = min(eligible, key=lambda name: (set_counts.get(name, 0), name))
+        suggestions.append({
+            'rawName': alias,
+            'suggestedName': pair[1] if alias == pair[0] else pair[0],
+            'nameSimilarity': round(name_score, 3),
+            'sharedOpponents': round(opponent_score, 3),
+            'score': round(score, 3),
+        })
+
+    # Best suggestion per alias, skipping any that would chain onto another alias
+    aliases, suggested_targets, kept = set(), set(), []
+    for row in sorted(suggestions, key=lambda row: (-row['score'], row['rawName'])):
+        if row['rawName'] in aliases or row['rawName'] in suggested_targets or row['suggestedName'] in aliases:
+            continue
+        aliases.add(row['rawName'])
+        suggested_targets.add(row['suggestedName'])
+        kept.append(row)
+    return kept
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzzy player search and alias suggestions for nameMappings.json.")
+    parser.add_argument('--search', help="Search for a player name and exit")
+    parser.add_argument('--limit', type=int, default=10, help="Maximum number of search results")
+    parser.add_argument('--json', action='store_true', help="Print suggestions as a nameMappings.json snippet")
+    args = parser.parse_args()
+
+    name_mappings = load_name_mappings()
+    sets_df = load_set_table(name_mappings=name_mappings)
+
+    if args.search:
+        index = build_player_index(sets_df, name_mappings)
+        start = time.perf_counter()
+        results = index.search(args.search, limit=args.limit)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print("\n".join(results) if results else "No matches found.")
+        print(f"({len(index.names)} names indexed, search took {elapsed_ms:.2f} ms)")
+        return
+
+    start = time.perf_counter()
+    suggestions = suggest_aliases(sets_df, name_mappings)
+    elapsed = time.perf_counter() - start
+    if args.json:
+        print(json.dumps({row['rawName']: row['suggestedName'] for row in suggestions}, indent=2))
+    else:
+        print(pd.DataFrame(suggestions).to_string(index=False) if suggestions else "No alias suggestions.")
+        print(f"\n{len(suggestions)} suggestions in {elapsed:.2f}s")
+
+if __name__ == '__main__':
+    main()
@@ -9,14 +9,8 @@ import os
 from pathlib import Path
 from datetime import datetime
 import joblib
-
-# Function to normalize player names
-def normalize_player_name(name):
-    separator = '| '
-    index = name.find(separator)
-    if index != -1:
-        return name[index + len(separator):].strip()
-    return name.strip()
+from set_table import load_set_table, load_name_mappings, canonical_name, normalize_player_name
+from opponent_graph import compute_graph_metrics
 
 # Load player data
 player_data_path = Path('src/data/playerDataPoints.json')  # Adjusted path
@@ -30,6 +24,20 @@ with player_data_path.open('r') as f:
 # Convert to DataFrame
 player_df = pd.DataFrame.from_dict(player_data, orient='index')
 
+# Load matches data
+matches_data_path = Path('src/data/matches.json')  # Adjusted path
+if not matches_data_path.exists():
+    print(f"Error: {matches_data_path} does not exist.")
+    exit(1)
+
+# Add strength-of-schedule metrics from the sparse opponent graph. The graph
+# merges aliases via nameMappings.json, so every alias key in player_df gets
+# the metrics of the canonical player it belongs to.
+name_mappings = load_name_mappings()
+graph_metrics = compute_graph_metrics(load_set_table(matches_data_path, name_mappings))
+canonical_index = [canonical_name(name, name_mappings) for name in player_df.index]
+player_df = player_df.join(graph_metrics.reindex(canonical_index).set_axis(player_df.index))
+
 # Drop non-numerical columns (including 'headToHeadRecords' to prevent dict subtraction)
 columns_to_drop = ['playerName', 'mostCommonOpponent', 'performanceTrend', 'headToHeadRecords']
 player_df = player_df.drop(columns=columns_to_drop, errors='ignore')
@@ -57,12 +65,6 @@ scaler_filename = 'src/dataProcessing/scaler.pkl'
 joblib.dump(scaler, scaler_filename)
 print(f"Scaler saved to {scaler_filename}")
 
-# Load matches data
-matches_data_path = Path('src/data/matches.json')  # Adjusted path
-if not matches_data_path.exists():
-    print(f"Error: {matches_data_path} does not exist.")
-    exit(1)
-
 matches_df = pd.read_json(matches_data_path)
 
 # Normalize player names in matches_df
@@ -169,6 +171,7 @@ def create_reverse_match_features(row):
 
 # Create training data
 features_list = []
+training_groups = []  # eventId of each training row, for event-level resampling
 
 for idx, row in matches_df.iterrows():
     try:
@@ -178,17 +181,16 @@ for idx, row in matches_df.iterrows():
             winner_features = create_match_features(row)
             if winner_features is not None:
                 features_list.append(winner_features)
+                training_groups.append(row['eventId'])
 
             # Loser vs Winner (to balance the dataset)
             loser_features = create_reverse_match_features(row)
             if loser_features is not None:
                 features_list.append(loser_features)
+                training_groups.append(row['eventId'])
     except Exception as e:
         print(f"Error processing match {idx}: {e}")
 
-# Remove None entries if any
-features_list = [f for f in features_list if f is not None]
-
 # Check if training data is not empty
 if not features_list:
     print("No valid training data found. Please check your data files.")
@@ -210,6 +212,7 @@ for feature in h2h_features:
 # Separate features and labels
 X = training_df.drop('label', axis=1)
 y = training_df['label']
+training_groups = np.array(training_groups)
 
 # Split the data
 X_train, X_test, y_train, y_test = train_test_split(
@@ -242,19 +245,18 @@ model_filename = 'src/dataProcessing/trained_logistic_regression_model.pkl'
 joblib.dump(model, model_filename)
 print(f"Model saved to {model_filename}")
 
-# Function to predict match outcome
-def predict_match_outcome(player1_name, player2_name, best_of_format, model):
+# Function to build the scaled feature vector for a matchup
+def build_match_feature_vector(player1_name, player2_name, best_of_format):
     """
-    Predicts the probability of player1 winning against player2.
+    Builds the model input for player1 against player2.
 
     Parameters:
     - player1_name (str): Name of the first player.
     - player2_name (str): Name of the second player.
     - best_of_format (str): 'Best of 3' or 'Best of 5'.
-    - model: Trained machine learning model.
 
     Returns:
-    - float: Probability of player1 winning.
+    - DataFrame: One-row feature vector in training column order, or None if a player is unknown.
     """
     # Normalize player names
     player1_name = normalize_player_name(player1_name)
@@ -302,10 +304,30 @@ def predict_match_outcome(player1_name, player2_name, best_of_format, model):
     # Apply the same scaling as training
     feature_vector[numerical_cols] = scaler.transform(feature_vector[numerical_cols])
 
+    return feature_vector[X.columns]
+
+# Function to predict match outcome
+def predict_match_outcome(player1_name, player2_name, best_of_format, model):
+    """
+    Predicts the probability of player1 winning against player2.
+
+    Parameters:
+    - player1_name (str): Name of the first player.
+    - player2_name (str): Name of the second player.
+    - best_of_format (str): 'Best of 3' or 'Best of 5'.
+    - model: Trained machine learning model.
+
+    Returns:
+    - float: Probability of player1 winning.
+    """
+    feature_vector = build_match_feature_vector(player1_name, player2_name, best_of_format)
+    if feature_vector is None:
+        return None
+
     # Predict probability
     prob = model.predict_proba(feature_vector)[0][1]
 
-    print(f"Probability that {player1_name} will win: {prob:.2f}")
+    print(f"Probability that {normalize_player_name(player1_name)} will win: {prob:.2f}")
     return prob
 
 # Example usage:
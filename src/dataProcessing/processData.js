@@ -2,6 +2,16 @@
 const fs = require('fs');
 const path = require('path');
 
+/**
+ * Derives the scene (weekly series) from a tournament slug by dropping the
+ * trailing edition number, e.g. 'foco-weekly-wednesday-201' -> 'foco-weekly-wednesday'.
+ * @param {string} tournamentName - The tournament slug.
+ * @returns {string} The scene name.
+ */
+function sceneFromTournament(tournamentName) {
+  return tournamentName.replace(/-\d+$/, '');
+}
+
 /**
  * Processes raw event data to extract match details.
  * @returns {Array} Array of match objects.
@@ -31,6 +41,7 @@ function processData() {
   for (const eventKey in allEventData) {
     const eventData = allEventData[eventKey];
     const { tournamentName, eventName, eventId, startAt, sets } = eventData;
+    const scene = eventData.scene || sceneFromTournament(tournamentName);
 
     // Validate essential event data
     if (!tournamentName || !eventName || !eventId || !sets) {
@@ -103,6 +114,7 @@ function processData() {
         // Construct the match object with original names
         const match = {
           setId: setId,
+          scene: scene,
           tournamentName: tournamentName,
           eventName: eventName,
           eventId: eventId,
@@ -0,0 +1,238 @@
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from set_table import DATA_DIR, load_set_table, load_name_mappings
+from opponent_graph import compute_graph_metrics
+from shared import add_workers_argument
+
+# ---------------------------
+# Paths
+# ---------------------------
+
+SCENES_DIR = DATA_DIR / 'scenes'
+CROSS_SCENE_TABLE_PATH = DATA_DIR / 'scenePlayerTable.json'
+SCENE_MODELS_PATH = Path(__file__).resolve().parent / 'scene_models.pkl'
+
+# ---------------------------
+# Player Table Columns
+# ---------------------------
+
+# Additive per-player counters. Rates are always recomputed from these, so
+# combining a player's scenes is a plain sum per canonical name.
+COUNT_COLUMNS = [
+    'totalMatchesPlayed',
+    'totalWins',
+    'totalGamesWon',
+    'totalGamesLost',
+    'bestOf3Played',
+    'bestOf3Wins',
+    'bestOf5Played',
+    'bestOf5Wins',
+    'decidingPlayed',
+    'decidingWins',
+    'straightPlayed',
+    'straightWins',
+    'totalEventsParticipated',
+]
+
+# rate column -> (numerator, denominator), in percent
+RATE_COLUMNS = {
+    'overallWinRate': ('totalWins', 'totalMatchesPlayed'),
+    'gameWinRate': ('totalGamesWon', 'totalGamesPlayed'),
+    'winRateBestOf3': ('bestOf3Wins', 'bestOf3Played'),
+    'winRateBestOf5': ('bestOf5Wins', 'bestOf5Played'),
+    'winRateDecidingGames': ('decidingWins', 'decidingPlayed'),
+    'winRateStraightMatches': ('straightWins', 'straightPlayed'),
+}
+
+MODEL_FEATURES = list(RATE_COLUMNS) + ['bradleyTerryStrength', 'opponentAdjustedWinRate']
+
+# Scenes with fewer sets than this get no model of their own
+MIN_SCENE_SETS = 50
+
+# ---------------------------
+# Feature Building
+# ---------------------------
+
+def player_perspective(sets_df):
+    """
+    Expands the set table to two rows per set, one from each player's side.
+    """
+    total_games = sets_df['winnerScore'] + sets_df['loserScore']
+    best_of_5 = (sets_df['bestOf'] == 'Best of 5').to_numpy()
+    shared = {
+        'eventId': sets_df['eventId'].to_numpy(),
+        'completedAt': sets_df['completedAt'].to_numpy(),
+        'bestOf5': best_of_5,
+        'deciding': (total_games == np.where(best_of_5, 5, 3)).to_numpy(),
+        'straight': (sets_df['loserScore'] == 0).to_numpy(),
+    }
+    winners = pd.DataFrame({
+        'player': sets_df['winnerName'].to_numpy(),
+        'won': 1,
+        'gamesWon': sets_df['winnerScore'].to_numpy(),
+        'gamesLost': sets_df['loserScore'].to_numpy(),
+        **shared,
+    })
+    losers = pd.DataFrame({
+        'player': sets_df['loserName'].to_numpy(),
+        'won': 0,
+        'gamesWon': sets_df['loserScore'].to_numpy(),
+        'gamesLost': sets_df['winnerScore'].to_numpy(),
+        **shared,
+    })
+    return pd.concat([winners, losers], ignore_index=True)
+
+def build_player_counts(sets_df):
+    rows = player_perspective(sets_df)
+    rows['bestOf3'] = ~rows['bestOf5']
+    for flag in ('bestOf3', 'bestOf5', 'deciding', 'straight'):
+        rows[f'{flag}Won'] = rows['won'] * rows[flag]
+
+    grouped = rows.groupby('player')
+    counts = pd.DataFrame({
+        'totalMatchesPlayed': grouped.size(),
+        'totalWins': grouped['won'].sum(),
+        'totalGamesWon': grouped['gamesWon'].sum(),
+        'totalGamesLost': grouped['gamesLost'].sum(),
+        'bestOf3Played': grouped['bestOf3'].sum(),
+        'bestOf3Wins': grouped['bestOf3Won'].sum(),
+        'bestOf5Played': grouped['bestOf5'].sum(),
+        'bestOf5Wins': grouped['bestOf5Won'].sum(),
+        'decidingPlayed': grouped['deciding'].sum(),
+        'decidingWins': grouped['decidingWon'].sum(),
+        'straightPlayed': grouped['straight'].sum(),
+        'straightWins': grouped['straightWon'].sum(),
+        # Events belong to exactly one scene, so this stays additive
+        'totalEventsParticipated': grouped['eventId'].nunique(),
+        'firstMatchAt': grouped['completedAt'].min(),
+        'lastMatchAt': grouped['completedAt'].max(),
+    })
+    counts.index.name = 'Player'
+    return counts
+
+def finalize_player_table(counts):
+    table = counts.copy()
+    table['totalLosses'] = table['totalMatchesPlayed'] - table['totalWins']
+    table['totalGamesPlayed'] = table['totalGamesWon'] + table['totalGamesLost']
+    for rate, (numerator, denominator) in RATE_COLUMNS.items():
+        table[rate] = (table[numerator] / table[denominator].where(table[denominator] > 0) * 100).fillna(0)
+    table['averageGamesPerMatch'] = (
+        table['totalGamesPlayed'] / table['totalMatchesPlayed'].where(table['totalMatchesPlayed'] > 0)
+    ).fillna(0)
+    return table
+
+def merge_scene_tables(scene_tables):
+    """
+    Combines per-scene player tables into one cross-scene table.
+
+    Counters are summed per canonical player and every rate is recomputed
+    from the summed counters (never averaged across scenes).
+    """
+    stacked = pd.concat(scene_tables, names=['scene', 'Player'])
+    by_player = stacked.groupby(level='Player')
+    merged = by_player[COUNT_COLUMNS].sum()
+    merged['firstMatchAt'] = by_player['firstMatchAt'].min()
+    merged['lastMatchAt'] = by_player['lastMatchAt'].max()
+    merged['scenesAttended'] = by_player.size()
+    # Scene list per player, used by the app's scene filter
+    scene_names = pd.Series(stacked.index.get_level_values('scene'), index=stacked.index)
+    merged['scenes'] = scene_names.groupby(level='Player').agg(sorted)
+    return finalize_player_table(merged)
+
+# ---------------------------
+# Model Training
+# ---------------------------
+
+def match_feature_matrix(sets_df, player_table, features=MODEL_FEATURES):
+    """
+    Builds stat-difference features for every set, in both orientations.
+
+    Returns X with the player stat differences plus the best-of format, and
+    y with 1 for the winner-first orientation and 0 for the reverse.
+    """
+    values = player_table[features].to_numpy(dtype=float)
+    winners = player_table.index.get_indexer(sets_df['winnerName'])
+    losers = player_table.index.get_indexer(sets_df['loserName'])
+    diff = values[winners] - values[losers]
+    best_of = np.where(sets_df['bestOf'] == 'Best of 5', 5, 3)[:, None]
+    X = np.vstack([np.hstack([diff, best_of]), np.hstack([-diff, best_of])])
+    y = np.concatenate([np.ones(len(diff)), np.zeros(len(diff))])
+    return X, y
+
+def train_scene_model(sets_df, player_table):
+    if len(sets_df) < MIN_SCENE_SETS:
+        return None
+    X, y = match_feature_matrix(sets_df, player_table)
+    scaler = StandardScaler()
+    model = LogisticRegression(penalty='l2', solver='lbfgs', max_iter=1000)
+    model.fit(scaler.fit_transform(X), y)
+    return {'features': MODEL_FEATURES, 'scaler': scaler, 'model': model, 'trainingSets': len(sets_df)}
+
+# ---------------------------
+# Per-Scene Builds
+# ---------------------------
+
+def build_scene(scene, scene_sets):
+    """
+    Builds one scene's player table and model. Runs inside a worker process.
+    """
+    table = finalize_player_table(build_player_counts(scene_sets))
+    table = table.join(compute_graph_metrics(scene_sets))
+    return scene, table, train_scene_model(scene_sets, table)
+
+def build_scenes(sets_df, max_workers=None):
+    """
+    Builds every scene in a process pool and merges the cross-scene table.
+
+    Returns:
+    - scene_tables (dict): scene -> player table.
+    - scene_models (dict): scene -> model bundle (None for tiny scenes).
+    - cross_scene_table (DataFrame): Combined player table with graph metrics
+      computed over the full cross-scene opponent graph.
+    """
+    # Largest scenes first so a big scene never ends up queued last
+    groups = sorted(sets_df.groupby('scene'), key=lambda item: len(item[1]), reverse=True)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(build_scene, scene, scene_sets) for scene, scene_sets in groups]
+        results = [future.result() for future in futures]
+
+    scene_tables = {scene: table for scene, table, _ in results}
+    scene_models = {scene: model for scene, _, model in results}
+    cross_scene_table = merge_scene_tables(scene_tables).join(compute_graph_metrics(sets_df))
+    return scene_tables, scene_models, cross_scene_table
+
+def save_scene_outputs(scene_tables, scene_models, cross_scene_table):
+    SCENES_DIR.mkdir(parents=True, exist_ok=True)
+    for scene, table in scene_tables.items():
+        table.to_json(SCENES_DIR / f'{scene}.json', orient='index', indent=2)
+    cross_scene_table.to_json(CROSS_SCENE_TABLE_PATH, orient='index', indent=2)
+    joblib.dump(scene_models, SCENE_MODELS_PATH)
+
+def main():
+    parser = argparse.ArgumentParser(description="Build per-scene player tables and models.")
+    add_workers_argument(parser)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    sets_df = load_set_table(name_mappings=load_name_mappings())
+    scene_tables, scene_models, cross_scene_table = build_scenes(sets_df, max_workers=args.workers)
+    save_scene_outputs(scene_tables, scene_models, cross_scene_table)
+    elapsed = time.perf_counter() - start
+
+    for scene, table in scene_tables.items():
+        trained = 'model trained' if scene_models[scene] is not None else 'too few sets for a model'
+        print(f"{scene}: {len(table)} players, {trained}")
+    print(f"Cross-scene table: {len(cross_scene_table)} players saved to {CROSS_SCENE_TABLE_PATH}")
+    print(f"Built {len(scene_tables)} scenes with {args.workers} workers in {elapsed:.2f}s")
+
+if __name__ == '__main__':
+    main()
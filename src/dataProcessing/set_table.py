@@ -0,0 +1,93 @@
+import json
+import re
+from pathlib import Path
+
+import pandas as pd
+
+# ---------------------------
+# Paths
+# ---------------------------
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+MATCHES_PATH = DATA_DIR / 'matches.json'
+NAME_MAPPINGS_PATH = Path(__file__).resolve().parent / 'nameMappings.json'
+
+# ---------------------------
+# Player Names
+# ---------------------------
+
+def normalize_player_name(name):
+    separator = '| '
+    index = name.find(separator)
+    if index != -1:
+        return name[index + len(separator):].strip()
+    return name.strip()
+
+def canonical_name(name, name_mappings=None):
+    """
+    Resolves a raw entrant name to the canonical player name.
+
+    The sponsor prefix is stripped first, then nameMappings.json is consulted
+    with both the raw and the normalized name.
+    """
+    if not name_mappings:
+        return normalize_player_name(name)
+    if name in name_mappings:
+        return name_mappings[name]
+    normalized = normalize_player_name(name)
+    return name_mappings.get(normalized, normalized)
+
+def load_name_mappings(name_mappings_path=NAME_MAPPINGS_PATH):
+    with open(name_mappings_path, 'r') as f:
+        return json.load(f)
+
+# ---------------------------
+# Scenes
+# ---------------------------
+
+def scene_of(tournament_name):
+    # 'foco-weekly-wednesday-201' -> 'foco-weekly-wednesday'
+    return re.sub(r'-\d+$', '', tournament_name)
+
+# ---------------------------
+# Set Table
+# ---------------------------
+
+def load_set_table(matches_path=MATCHES_PATH, name_mappings=None):
+    """
+    Loads matches.json as one row per set with canonical player names.
+
+    The raw entrant names are kept in 'winnerRawName' / 'loserRawName'.
+    Every set carries a 'scene' (weekly series); older matches.json files
+    without one get it derived from the tournament slug.
+    Missing and negative scores (DQs) become 0 so game counts stay meaningful.
+    """
+    with open(matches_path, 'r') as f:
+        matches = json.load(f)
+    return set_table_from_records(matches, name_mappings)
+
+def set_table_from_records(matches, name_mappings=None):
+    sets_df = pd.DataFrame(matches)
+    if sets_df.empty:
+        return sets_df
+
+    if 'scene' not in sets_df.columns:
+        sets_df['scene'] = None
+    missing_scene = sets_df['scene'].isna()
+    sets_df.loc[missing_scene, 'scene'] = sets_df.loc[missing_scene, 'tournamentName'].map(scene_of)
+
+    sets_df['winnerRawName'] = sets_df['winnerName']
+    sets_df['loserRawName'] = sets_df['loserName']
+
+    # Resolve each distinct raw name once instead of once per set
+    raw_names = pd.unique(pd.concat([sets_df['winnerName'], sets_df['loserName']]))
+    resolved = {name: canonical_name(name, name_mappings) for name in raw_names}
+    sets_df['winnerName'] = sets_df['winnerName'].map(resolved)
+    sets_df['loserName'] = sets_df['loserName'].map(resolved)
+
+    sets_df['winnerScore'] = sets_df['winnerScore'].fillna(0).clip(lower=0)
+    sets_df['loserScore'] = sets_df['loserScore'].fillna(0).clip(lower=0)
+
+    # Drop self-matches created by alias merging
+    sets_df = sets_df[sets_df['winnerName'] != sets_df['loserName']]
+    return sets_df.reset_index(drop=True)
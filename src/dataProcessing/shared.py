@@ -0,0 +1,62 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# ---------------------------
+# Process Pools
+# ---------------------------
+
+# Filled in each worker process by the pool initializer, so tasks only
+# receive their own small argument instead of a copy of the shared arrays
+worker_data = {}
+
+def _init_worker(data):
+    worker_data.update(data)
+
+def pool_map(fn, items, max_workers=None, shared=None):
+    """
+    Maps fn over items in a process pool and returns the results in order.
+
+    'shared' (dict) is sent once per worker and read by fn via worker_data.
+    Items are batched so each worker gets about four chunks.
+    """
+    items = list(items)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(shared or {},)) as executor:
+        chunksize = max(1, len(items) // (4 * (max_workers or os.cpu_count() or 1)))
+        return list(executor.map(fn, items, chunksize=chunksize))
+
+def add_workers_argument(parser):
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes (default: all cores)")
+
+# ---------------------------
+# Elo and Head-to-Head
+# ---------------------------
+
+ELO_START = 1500.0
+ELO_K = 32.0
+
+def elo_expected(rating, opponent_rating):
+    # Works on scalars and on numpy arrays of opponent ratings
+    return 1.0 / (1.0 + 10 ** ((opponent_rating - rating) / 400))
+
+def record_set(elo, h2h, winner, loser):
+    """
+    Applies one set to the Elo ratings and the head-to-head records.
+
+    elo is an array indexed by player id; h2h maps (low id, high id) to
+    [sets, sets won by low id].
+    """
+    expected = elo_expected(elo[winner], elo[loser])
+    elo[winner] += ELO_K * (1 - expected)
+    elo[loser] -= ELO_K * (1 - expected)
+    record = h2h.setdefault((min(winner, loser), max(winner, loser)), [0, 0])
+    record[0] += 1
+    record[1] += winner < loser
+
+def head_to_head(h2h, player, opponent):
+    """
+    Returns (sets won by player, sets played) between two player ids.
+    """
+    sets, low_wins = h2h.get((min(player, opponent), max(player, opponent)), (0, 0))
+    wins = low_wins if player < opponent else sets - low_wins
+    return wins, sets